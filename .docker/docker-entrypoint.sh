@@ -46,6 +46,11 @@ elif [[ "${1}" == "celery" ]]; then
 
     exec celery -A $APP -l $LOG_LEVEL -c $CONCURRENCY --maxtasksperchild=$MAX_TASKS worker -Q $QUEUES
 
+elif [[ "${1}" == "asgi" ]]; then
+    # uvicorn workers, public menu and healthz are served by coroutine views
+    export GUNICORN_PROFILE="${GUNICORN_PROFILE:-asgi}"
+    exec gunicorn --config=gunicorn_config.py backend_test.asgi
+
 else
     
     exec gunicorn --config=gunicorn_config.py backend_test.wsgi
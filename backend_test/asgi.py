@@ -0,0 +1,22 @@
+"""
+ASGI config for mysite project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+the public menu and healthz are served by coroutine views (see
+``backend_test.urls.async_urlpatterns``) and everything else by django.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+"""
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_test.settings")
+django.setup(set_prefix=False)
+
+from backend_test.urls import async_urlpatterns  # noqa: E402
+from backend_test.utils.asgi_handler import AsyncViewsASGIHandler  # noqa: E402
+
+application = AsyncViewsASGIHandler(async_urlpatterns)
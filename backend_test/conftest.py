@@ -5,9 +5,12 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase, TransactionTestCase
 from mixer.backend.django import mixer
 
+from backend_test.utils.fluent_stub_server import FluentForwardStubServer
+from backend_test.utils.slack_stub_server import SlackWebhookStubServer
 from meal_api.models import (
     Menu, MenuOption,
     Nationality,
+    NotificationDelivery,
     Order,
 )
 
@@ -52,3 +55,36 @@ def menu_with_meal_options():
             option_number=idx,
         )
     return menu
+
+
+@pytest.fixture
+def slack_stub_server():
+    with SlackWebhookStubServer() as stub_server:
+        yield stub_server
+
+
+@pytest.fixture
+def fluent_stub_server():
+    with FluentForwardStubServer() as stub_server:
+        yield stub_server
+
+
+@pytest.fixture
+def notification_deliveries(menu_with_meal_options, slack_stub_server):
+    """
+    Pending notification deliveries of menu_with_meal_options, the slack
+    web hook of the n-th employee is /services/n on the slack stub server
+    """
+    return [
+        mixer.blend(
+            NotificationDelivery,
+            menu=menu_with_meal_options,
+            employee=mixer.blend(
+                get_user_model(),
+                nationality=mixer.blend(Nationality),
+                slack_web_hook=slack_stub_server.get_web_hook_url(idx),
+            ),
+            status=NotificationDelivery.PENDING,
+        )
+        for idx in range(10)
+    ]
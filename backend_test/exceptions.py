@@ -4,6 +4,7 @@ from pprint import pformat
 class SlackMessageException(Exception):
 
     def __init__(self, response_object, message=None):
+        self.response = response_object
         self.status_code = response_object.status_code
         self.requested_params = {
             'slack_web_hook': response_object.request.url,
@@ -19,3 +20,16 @@ class SlackMessageException(Exception):
             f"Slack message was not sent successfully [{self.status_code}]"
             f" received, requested params: {self.requested_params}"
         )
+
+
+class SlackDeadlineExceeded(Exception):
+    """
+    Raised when a slack message could not be sent before the deadline of
+    the task sending it, the message is left to be sent on a later run
+    """
+
+    def __init__(self, web_hook_url):
+        self.web_hook_url = web_hook_url
+        super().__init__(
+            f"Slack message to {web_hook_url} was not sent before the deadline"
+        )
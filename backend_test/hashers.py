@@ -0,0 +1,34 @@
+"""
+Password hashers whose cost is read from the settings instead of being fixed
+by the django release, so it can be tuned per deployment. A stored hash made
+with a different cost than the configured one is rehashed by django on the
+next successful login, same as a hash made by a different hasher.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return settings.BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
@@ -1,10 +1,12 @@
 import json
 import logging
 from importlib import import_module
-from typing import Any, Dict, Type, Union
+from typing import Any, Callable, Dict, Type, Union
 
 from fluent.handler import FluentRecordFormatter
 
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
 
 class VerboseFluentRecordFormatter(FluentRecordFormatter):
     def __init__(
@@ -13,11 +15,16 @@ class VerboseFluentRecordFormatter(FluentRecordFormatter):
         raise_on_format_error: bool = False,
         encoder_class: Union[str, Type[json.JSONEncoder]] = json.JSONEncoder,
         encoder_options: Dict[str, Any] = None,
+        sanitize: bool = False,
         **kwargs: Any,
     ) -> None:
         self.raise_on_format_error = raise_on_format_error
         self.encoder_class = encoder_class
         self.encoder_options = encoder_options or {}
+        # sanitize mode builds the msgpack safe values in a single pass instead
+        # of encoding to json and parsing the result back
+        self.sanitize = sanitize
+        self._sanitizers: Dict[Type, Callable[[Any, set], Any]] = {}
         super().__init__(**kwargs)
 
     @property
@@ -42,8 +49,96 @@ class VerboseFluentRecordFormatter(FluentRecordFormatter):
         return self._encoder
 
     def json_encode(self, obj: Any) -> Dict:
+        if self.sanitize:
+            if type(obj) in PRIMITIVE_TYPES:
+                return obj
+            return self._sanitize(obj, set())
+
         return json.loads(self.encoder.encode(obj))
 
+    def _sanitize(self, obj: Any, markers: set) -> Any:
+        obj_type = type(obj)
+        sanitizer = self._sanitizers.get(obj_type)
+
+        if sanitizer is None:
+            sanitizer = self._sanitizers[obj_type] = self._get_sanitizer(obj_type)
+
+        return sanitizer(obj, markers)
+
+    def _get_sanitizer(self, obj_type: Type) -> Callable[[Any, set], Any]:
+        """
+        Resolves how values of the given type are sanitized, mirroring what
+        a json round trip of them would produce
+        """
+        if obj_type in PRIMITIVE_TYPES:
+            return lambda obj, markers: obj
+        # str and int subclasses (i.e enums) are encoded as their base value
+        if issubclass(obj_type, str):
+            return lambda obj, markers: str.__str__(obj)
+        if issubclass(obj_type, int) and not issubclass(obj_type, bool):
+            return lambda obj, markers: int(obj)
+        if issubclass(obj_type, float):
+            return lambda obj, markers: float(obj)
+        if issubclass(obj_type, dict):
+            return self._sanitize_dict
+        if issubclass(obj_type, (list, tuple)):
+            return self._sanitize_list
+        return self._sanitize_default
+
+    def _check_circular(self, obj: Any, markers: set) -> int:
+        marker = id(obj)
+
+        if marker in markers:
+            raise ValueError("Circular reference detected")
+        markers.add(marker)
+
+        return marker
+
+    def _sanitize_key(self, key: Any) -> Union[str, None]:
+        if isinstance(key, str):
+            return str.__str__(key)
+        if isinstance(key, PRIMITIVE_TYPES):
+            return json.dumps(key)
+        if self.encoder.skipkeys:
+            return None
+        raise TypeError(
+            f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+        )
+
+    def _sanitize_dict(self, obj: Dict, markers: set) -> Dict:
+        marker = self._check_circular(obj, markers)
+        sanitized = {}
+
+        for key, value in obj.items():
+            if type(key) is not str:
+                key = self._sanitize_key(key)
+                if key is None:
+                    continue
+
+            sanitized[key] = (
+                value if type(value) in PRIMITIVE_TYPES else self._sanitize(value, markers)
+            )
+
+        markers.remove(marker)
+        return sanitized
+
+    def _sanitize_list(self, obj: Union[list, tuple], markers: set) -> list:
+        marker = self._check_circular(obj, markers)
+        sanitized = [
+            value if type(value) in PRIMITIVE_TYPES else self._sanitize(value, markers)
+            for value in obj
+        ]
+
+        markers.remove(marker)
+        return sanitized
+
+    def _sanitize_default(self, obj: Any, markers: set) -> Any:
+        marker = self._check_circular(obj, markers)
+        sanitized = self._sanitize(self.encoder.default(obj), markers)
+
+        markers.remove(marker)
+        return sanitized
+
     def _format_msg_default(self, record, msg):
         return {"message": record.getMessage()}
 
@@ -0,0 +1,175 @@
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import msgpack
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+
+class BatchedFluentHandler(logging.Handler):
+    """
+    Non blocking fluent handler, records are formatted on the logging thread
+    and buffered, a sender thread ships them to fluentbit in batches of up to
+    batch_size records (forward protocol, forward mode) over a single
+    connection, so a slow or unreachable fluentbit never stalls the caller.
+
+    The buffer holds up to capacity records, once full the overflow policy
+    drops the incoming record (drop_newest) or the oldest buffered one
+    (drop_oldest). Dropped records are counted in dropped_count, records
+    that could not be sent in failed_count and shipped ones in sent_count
+    """
+
+    def __init__(
+        self,
+        tag,
+        host="localhost",
+        port=24224,
+        timeout=3.0,
+        capacity=10000,
+        batch_size=100,
+        overflow=DROP_NEWEST,
+        level=logging.NOTSET,
+    ):
+        super().__init__(level=level)
+
+        if overflow not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown overflow policy {overflow}")
+
+        self.tag = tag
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.sent_count = 0
+        self._reset()
+        # threads do not survive fork (i.e gunicorn preloading the app), the
+        # child starts its own sender with an empty buffer
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._condition = threading.Condition()
+        self._buffer = deque()
+        self._closed = False
+        self._sending = False
+        self._sender = None
+        self._socket = None
+
+    def _start_sender(self):
+        self._sender = threading.Thread(
+            target=self._send_batches, name="fluent-sender", daemon=True
+        )
+        self._sender.start()
+
+    def emit(self, record):
+        try:
+            data = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._condition:
+            if self._closed:
+                return
+
+            if self._sender is None:
+                self._start_sender()
+
+            if len(self._buffer) >= self.capacity:
+                self.dropped_count += 1
+
+                if self.overflow == DROP_NEWEST:
+                    return
+
+                self._buffer.popleft()
+
+            self._buffer.append((int(record.created), data))
+            self._condition.notify_all()
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._buffer and not self._closed:
+                self._condition.wait()
+
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(len(self._buffer), self.batch_size))
+            ]
+            self._sending = bool(batch)
+
+            return batch
+
+    def _send_batches(self):
+        batch = self._next_batch()
+
+        while batch:
+            self._send(batch)
+
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+
+            batch = self._next_batch()
+
+        self._close_socket()
+
+    def _send(self, batch):
+        payload = msgpack.packb(
+            [self.tag, [list(entry) for entry in batch]], use_bin_type=True
+        )
+
+        # a dropped connection is retried once on a new one
+        for _ in range(2):
+            try:
+                if self._socket is None:
+                    self._socket = socket.create_connection(
+                        (self.host, self.port), timeout=self.timeout
+                    )
+                self._socket.sendall(payload)
+            except OSError:
+                self._close_socket()
+            else:
+                self.sent_count += len(batch)
+                return
+
+        self.failed_count += len(batch)
+
+    def _close_socket(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def flush(self, timeout=None):
+        """
+        Waits up to timeout seconds (the handler timeout by default) for the
+        buffered records to be sent
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+
+        with self._condition:
+            while self._buffer or self._sending:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0 or self._sender is None:
+                    return
+
+                self._condition.wait(remaining)
+
+    def close(self):
+        with self._condition:
+            sender = self._sender
+            self._closed = True
+            self._condition.notify_all()
+
+        if sender is not None:
+            sender.join(self.timeout)
+
+        super().close()
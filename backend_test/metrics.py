@@ -0,0 +1,158 @@
+"""
+Prometheus metrics of the web and celery processes. Under gunicorn every
+worker is a separate process, when the prometheus_multiproc_dir env var is
+set (to a directory shared by all of them and wiped on deploy) metrics are
+written there and /metrics aggregates the files of every process.
+/metrics is restricted to a bearer token or to allowed networks, see
+METRICS_TOKEN and METRICS_ALLOWED_NETWORKS.
+"""
+import ipaddress
+import os
+import time
+
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS_DIR_ENV = "prometheus_multiproc_dir"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling the requests, by view",
+    ["view", "route", "method", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run per request, by view",
+    ["view", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float("inf")),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent on database queries per request, by view",
+    ["view", "route"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Lookups of the application caches, by result (hit or miss)",
+    ["cache", "result"],
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Time spent running the celery tasks, by final state",
+    ["task", "state"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float("inf")),
+)
+
+
+def get_view_labels(request):
+    """
+    Names the view that handled the request after its class (the viewset
+    for DRF routers) and the url name, requests that did not resolve to any
+    view are grouped under "unresolved"
+    """
+    resolver_match = getattr(request, "resolver_match", None)
+
+    if resolver_match is None:
+        return {"view": "unresolved", "route": "unresolved"}
+
+    view = getattr(resolver_match.func, "cls", None) or resolver_match.func
+
+    return {
+        "view": getattr(view, "__name__", view.__class__.__name__),
+        "route": resolver_match.view_name,
+    }
+
+
+def observe_request(request, response, duration, query_counter):
+    view_labels = get_view_labels(request)
+    REQUEST_LATENCY.labels(
+        method=request.method, status=response.status_code, **view_labels
+    ).observe(duration)
+    REQUEST_DB_QUERIES.labels(**view_labels).observe(query_counter.count)
+    REQUEST_DB_DURATION.labels(**view_labels).observe(query_counter.duration)
+
+
+def observe_cache_lookup(cache_name, value):
+    """ Counts a cache lookup as a hit unless value is None, returns value """
+    CACHE_LOOKUPS.labels(
+        cache=cache_name, result="miss" if value is None else "hit"
+    ).inc()
+
+    return value
+
+
+def get_registry():
+    if MULTIPROCESS_DIR_ENV not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    return registry
+
+
+def is_metrics_request_allowed(request):
+    """
+    Tells whether the request may read the metrics, that is when it sends
+    the METRICS_TOKEN as a bearer token or comes from one of the
+    METRICS_ALLOWED_NETWORKS
+    """
+    if settings.METRICS_TOKEN and constant_time_compare(
+        request.META.get("HTTP_AUTHORIZATION", ""),
+        f"Bearer {settings.METRICS_TOKEN}",
+    ):
+        return True
+
+    try:
+        remote_address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+
+    return any(
+        remote_address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics(request, *args, **kwargs):
+    if not is_metrics_request_allowed(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+_tasks_started_at = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _tasks_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started_at = _tasks_started_at.pop(task_id, None)
+
+    if started_at is not None:
+        CELERY_TASK_DURATION.labels(task=task.name, state=state).observe(
+            time.perf_counter() - started_at
+        )
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(pid=None, **kwargs):
+    if MULTIPROCESS_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -1,6 +1,37 @@
+import logging
+import time
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.utils.cache import add_never_cache_headers
+from django.db import connection
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+
+from .metrics import observe_request
+from .utils.db_utils import QueryCounter
+
+LOGGER = logging.getLogger(__name__)
+
+
+@contextmanager
+def count_request_queries(request):
+    """
+    Counts the database queries of the request and the time spent on them,
+    a single counter is installed per request and shared by every
+    middleware counting them, so queries go through a single wrapper.
+    Streaming responses run the queries producing their content after the
+    middleware returned, those queries are not counted
+    """
+    query_counter = getattr(request, "query_counter", None)
+
+    if query_counter is not None:
+        yield query_counter
+        return
+
+    query_counter = request.query_counter = QueryCounter()
+
+    with connection.execute_wrapper(query_counter):
+        yield query_counter
 
 
 class HealthCheckAwareSessionMiddleware(SessionMiddleware):
@@ -11,6 +42,11 @@ class HealthCheckAwareSessionMiddleware(SessionMiddleware):
 
 
 class HeaderNoCacheMiddleware(object):
+    """ Marks GET responses as uncacheable unless they already carry a
+        Cache-Control header or the view opted in to short-lived caching
+        by setting `cache_control_directives` on the response.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -18,6 +54,94 @@ class HeaderNoCacheMiddleware(object):
         response = self.get_response(request)
 
         if request.method == "GET" and not response.has_header("Cache-Control"):
-            add_never_cache_headers(response)
+            cache_control_directives = getattr(
+                response, "cache_control_directives", None
+            )
+
+            if cache_control_directives is None:
+                add_never_cache_headers(response)
+            else:
+                patch_cache_control(response, **cache_control_directives)
+
+        return response
+
+
+class QueryBudgetMiddleware(object):
+    """ Counts the database queries of every request and the time spent on
+        them, requests going over the budget of their view (QUERY_BUDGETS by
+        url name, QUERY_BUDGET_QUERIES and QUERY_BUDGET_DB_TIME otherwise)
+        are logged as warnings. Adds a Server-Timing header with them when
+        SERVER_TIMING_HEADER is set. The queries run while streaming a
+        response are not counted, see count_request_queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+
+        with count_request_queries(request) as query_counter:
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started_at
+        resolver_match = getattr(request, "resolver_match", None)
+        route = resolver_match.view_name if resolver_match else None
+        budget = {
+            "queries": settings.QUERY_BUDGET_QUERIES,
+            "db_time": settings.QUERY_BUDGET_DB_TIME,
+            **settings.QUERY_BUDGETS.get(route, {}),
+        }
+
+        if (
+            query_counter.count > budget["queries"]
+            or query_counter.duration > budget["db_time"]
+        ):
+            LOGGER.warning(
+                f"Query budget exceeded on {route}",
+                extra={
+                    "data": {
+                        "route": route,
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "queries": query_counter.count,
+                        "queries_budget": budget["queries"],
+                        "db_time": query_counter.duration,
+                        "db_time_budget": budget["db_time"],
+                        "duration": duration,
+                    },
+                },
+            )
+
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = (
+                f"db;dur={query_counter.duration * 1000:.1f};"
+                f'desc="{query_counter.count} queries", '
+                f"total;dur={duration * 1000:.1f}"
+            )
+
+        return response
+
+
+class MetricsMiddleware(object):
+    """ Records the latency and the database queries of every request by
+        view, see backend_test.metrics. The queries run and the time spent
+        while streaming a response are not recorded, see
+        count_request_queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+
+        with count_request_queries(request) as query_counter:
+            response = self.get_response(request)
+
+        observe_request(
+            request, response, time.perf_counter() - started_at, query_counter
+        )
 
         return response
@@ -0,0 +1,112 @@
+"""
+Token bucket rate limiter kept in redis, so every celery worker draws from
+the same bucket. Buckets are refilled and drawn by a lua script using the
+redis clock, which keeps the check and the draw atomic and the workers
+clocks out of the picture.
+"""
+import time
+
+from django_redis import get_redis_connection
+
+RATE_LIMIT_KEY = "rate-limit:{name}"
+
+# Returns 0 when a token was taken, otherwise the milliseconds to wait
+# before one is available
+ACQUIRE_SCRIPT = """
+redis.replicate_commands()
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+
+if updated_at > now then
+    return updated_at - now
+end
+
+tokens = math.min(capacity, tokens + (now - updated_at) * rate / 1000)
+local wait = 0
+
+if tokens < 1 then
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+else
+    tokens = tokens - 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+# Empties the bucket and postpones its refill for ARGV[1] milliseconds,
+# a shorter pause never shortens one already in place
+PAUSE_SCRIPT = """
+redis.replicate_commands()
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local paused_until = now + tonumber(ARGV[1])
+local updated_at = tonumber(redis.call("HGET", KEYS[1], "updated_at")) or 0
+
+if updated_at > paused_until then
+    return updated_at - now
+end
+
+redis.call("HSET", KEYS[1], "tokens", 0, "updated_at", paused_until)
+redis.call(
+    "PEXPIRE", KEYS[1], tonumber(ARGV[1]) + math.ceil(capacity * 1000 / rate) + 1000
+)
+return paused_until - now
+"""
+
+
+class TokenBucketRateLimiter:
+    """
+    Allows `rate` acquisitions per second with bursts of up to `capacity`,
+    shared by every process using the same name
+    """
+
+    def __init__(self, name, rate, capacity, redis_connection=None):
+        self.key = RATE_LIMIT_KEY.format(name=name)
+        self.rate = rate
+        self.capacity = capacity
+        redis_connection = redis_connection or get_redis_connection("default")
+        self._acquire_script = redis_connection.register_script(ACQUIRE_SCRIPT)
+        self._pause_script = redis_connection.register_script(PAUSE_SCRIPT)
+
+    def try_acquire(self):
+        """
+        Takes a token if one is available, returns 0 when it was taken,
+        otherwise the seconds to wait before trying again
+        """
+        wait = self._acquire_script(keys=[self.key], args=[self.rate, self.capacity])
+        return wait / 1000
+
+    def acquire(self, deadline=None):
+        """
+        Blocks until a token is taken, or until the deadline (a
+        time.monotonic() value) if a token can't be taken before it.
+        Returns whether the token was taken
+        """
+        wait = self.try_acquire()
+
+        while wait:
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+
+            time.sleep(wait)
+            wait = self.try_acquire()
+
+        return True
+
+    def pause(self, seconds):
+        """
+        Stops handing out tokens for the given seconds, i.e when the rate
+        limited service asks to back off
+        """
+        self._pause_script(
+            keys=[self.key], args=[int(seconds * 1000), self.rate, self.capacity]
+        )
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 from .envtools import getenv
 
 # import sentry_sdk
@@ -29,6 +31,13 @@ ALLOWED_HOSTS = ["*"]
 
 USE_X_FORWARDED_HOST = False
 SESSION_COOKIE_HTTPONLY = True
+# sessions are read from the default (redis) cache, the cached_db engine also
+# writes them through to the database so they outlive the cache, the cache
+# engine keeps them in redis only
+SESSION_ENGINE = getenv(
+    "SESSION_ENGINE", default="django.contrib.sessions.backends.cached_db"
+)
+SESSION_CACHE_ALIAS = "default"
 
 SERVER_URL = os.getenv("SERVER_URL", default="*")
 
@@ -51,9 +60,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "backend_test.middleware.HealthCheckAwareSessionMiddleware",
+    "backend_test.middleware.MetricsMiddleware",
+    "backend_test.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "backend_test.middleware.HealthCheckAwareSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -127,6 +137,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New passwords are hashed by PASSWORD_HASHER, hashes made by the other ones
+# are still verified and upgraded to it on the next login, as are hashes made
+# with a different cost than the configured one. The test suite hashes with
+# md5 (see the md5_password_hasher fixtures) since the other hashers are
+# deliberately slow, md5 is refused unless DEBUG is set
+PASSWORD_HASHER = getenv("PASSWORD_HASHER", default="argon2")
+
+if PASSWORD_HASHER == "md5" and not DEBUG:
+    raise ImproperlyConfigured("The md5 password hasher requires DEBUG")
+
+PASSWORD_HASHERS_BY_NAME = {
+    "argon2": "backend_test.hashers.Argon2PasswordHasher",
+    "bcrypt": "backend_test.hashers.BCryptSHA256PasswordHasher",
+    "pbkdf2": "backend_test.hashers.PBKDF2PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "md5": "django.contrib.auth.hashers.MD5PasswordHasher",
+}
+PASSWORD_HASHERS = [PASSWORD_HASHERS_BY_NAME[PASSWORD_HASHER]] + [
+    hasher
+    for name, hasher in PASSWORD_HASHERS_BY_NAME.items()
+    if name not in (PASSWORD_HASHER, "md5")
+]
+ARGON2_TIME_COST = getenv("ARGON2_TIME_COST", default="2", coalesce=int)
+# kibibytes
+ARGON2_MEMORY_COST = getenv("ARGON2_MEMORY_COST", default="512", coalesce=int)
+ARGON2_PARALLELISM = getenv("ARGON2_PARALLELISM", default="2", coalesce=int)
+BCRYPT_ROUNDS = getenv("BCRYPT_ROUNDS", default="12", coalesce=int)
+PBKDF2_ITERATIONS = getenv("PBKDF2_ITERATIONS", default="180000", coalesce=int)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -149,9 +188,24 @@ STATIC_URL = "/static/"
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer", "rest_framework.renderers.BrowsableAPIRenderer"],
+    # api clients send no session cookie, so the session authentication
+    # makes no query for them before their token is verified
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
+        "meal_api.authentication.SignedTokenAuthentication",
     ],
+    # requests per client address of the views throttled by scope, and per
+    # submitted email of the token requests
+    "DEFAULT_THROTTLE_RATES": {
+        "api-token": getenv("API_TOKEN_THROTTLE_RATE", default="10/minute"),
+        "api-token-email": getenv(
+            "API_TOKEN_EMAIL_THROTTLE_RATE", default="20/hour"
+        ),
+    },
+    # number of proxies in front of the app, the client address is taken
+    # from X-Forwarded-For that many hops back from the end, with no proxy
+    # the header can be forged so REMOTE_ADDR is used
+    "NUM_PROXIES": getenv("NUM_PROXIES", default="0", coalesce=int),
 }
 
 if getenv("BROWSABLE_API_RENDERER", default=False, coalesce=bool):
@@ -161,6 +215,118 @@ if getenv("BROWSABLE_API_RENDERER", default=False, coalesce=bool):
 
 # APP SPECIFIC SETTINGS
 
+# seconds a rendered public menu is kept in the cache, entries are also
+# rebuilt on publish and dropped whenever the menu or its options change
+PUBLIC_MENU_CACHE_TIMEOUT = getenv(
+    "PUBLIC_MENU_CACHE_TIMEOUT", default="3600", coalesce=int
+)
+
+# seconds api tokens are valid for, verified token principals are cached for
+# API_TOKEN_CACHE_TIMEOUT seconds, which is also how long a deactivation or a
+# password change takes to revoke the tokens already in use
+API_TOKEN_MAX_AGE = getenv(
+    "API_TOKEN_MAX_AGE", default=str(60 * 60 * 24 * 30), coalesce=int
+)
+API_TOKEN_CACHE_TIMEOUT = getenv(
+    "API_TOKEN_CACHE_TIMEOUT", default="300", coalesce=int
+)
+
+# requests running more than QUERY_BUDGET_QUERIES queries or spending more
+# than QUERY_BUDGET_DB_TIME seconds on them are logged as warnings, budgets
+# of specific views are set by url name in QUERY_BUDGETS. Server-Timing
+# headers with the database usage are added when SERVER_TIMING_HEADER is set
+QUERY_BUDGET_QUERIES = getenv("QUERY_BUDGET_QUERIES", default="10", coalesce=int)
+QUERY_BUDGET_DB_TIME = getenv(
+    "QUERY_BUDGET_DB_TIME", default="0.25", coalesce=float
+)
+QUERY_BUDGETS = {
+    # session and user lookups plus the menu and its options on cache misses
+    "public-menu": {"queries": 4},
+    # session and user lookups plus the single statement placing the order
+    "meal_api:order-list": {"queries": 3},
+}
+SERVER_TIMING_HEADER = getenv("SERVER_TIMING_HEADER", default="False", coalesce=bool)
+
+# /metrics is only served to the requests sending METRICS_TOKEN as a bearer
+# token or coming from METRICS_ALLOWED_NETWORKS (comma separated), behind a
+# proxy the remote address is the proxy's so the token must be used instead
+METRICS_TOKEN = getenv("METRICS_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = getenv(
+    "METRICS_ALLOWED_NETWORKS",
+    default="127.0.0.1/32,::1/128",
+    coalesce=lambda value: [
+        network.strip() for network in value.split(",") if network.strip()
+    ],
+)
+
+# responses of the coroutine views served under ASGI only go through these
+# middleware, the requests they hand over get the whole MIDDLEWARE stack
+ASYNC_VIEWS_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "backend_test.middleware.HeaderNoCacheMiddleware",
+]
+
+# max-age (seconds) of the GET responses that emit validators (ETag and
+# Last-Modified), clients revalidate them with conditional requests afterwards
+HTTP_CACHE_MAX_AGE = getenv("HTTP_CACHE_MAX_AGE", default="30", coalesce=int)
+
+# orders listings are paginated by cursor, streamed exports are read from the
+# database ORDERS_STREAM_BATCH_SIZE rows at a time
+ORDERS_PAGE_SIZE = getenv("ORDERS_PAGE_SIZE", default="100", coalesce=int)
+ORDERS_MAX_PAGE_SIZE = getenv("ORDERS_MAX_PAGE_SIZE", default="1000", coalesce=int)
+ORDERS_STREAM_BATCH_SIZE = getenv(
+    "ORDERS_STREAM_BATCH_SIZE", default="2000", coalesce=int
+)
+
+# slack menu notifications, messages are sent by a bounded pool of threads
+# sharing keep-alive connections
+SLACK_NOTIFICATION_CONCURRENCY = getenv(
+    "SLACK_NOTIFICATION_CONCURRENCY", default="16", coalesce=int
+)
+SLACK_WEB_HOOK_TIMEOUT = getenv("SLACK_WEB_HOOK_TIMEOUT", default="5", coalesce=float)
+# recipients are delivered by celery sub-tasks of this many web hooks each,
+# their delivery statuses are saved every SLACK_DELIVERY_STATUS_BATCH_SIZE
+# sent messages
+SLACK_NOTIFICATION_CHUNK_SIZE = getenv(
+    "SLACK_NOTIFICATION_CHUNK_SIZE", default="200", coalesce=int
+)
+SLACK_DELIVERY_STATUS_BATCH_SIZE = getenv(
+    "SLACK_DELIVERY_STATUS_BATCH_SIZE", default="50", coalesce=int
+)
+# deliveries are claimed by the chunk task sending them, a claim older than
+# this many seconds is left by a killed task, it must be longer than the
+# celery task time limit
+SLACK_DELIVERY_CLAIM_TIMEOUT = getenv(
+    "SLACK_DELIVERY_CLAIM_TIMEOUT", default="300", coalesce=int
+)
+# requests to every slack host are rate limited to SLACK_RATE_LIMIT per second
+# with bursts of SLACK_RATE_LIMIT_BURST across all workers, 0 disables it.
+# 429 and 5xx responses are retried up to SLACK_WEB_HOOK_MAX_RETRIES times
+# honoring Retry-After or with a jittered exponential backoff, both capped at
+# SLACK_RETRY_BACKOFF_MAX. A chunk task sends messages, retries included, until
+# its celery soft time limit minus SLACK_CHUNK_DEADLINE_MARGIN seconds, the
+# margin must cover SLACK_WEB_HOOK_TIMEOUT and saving the statuses, the
+# messages not sent by then are left pending
+SLACK_RATE_LIMIT = getenv("SLACK_RATE_LIMIT", default="50", coalesce=float)
+SLACK_RATE_LIMIT_BURST = getenv("SLACK_RATE_LIMIT_BURST", default="50", coalesce=int)
+SLACK_WEB_HOOK_MAX_RETRIES = getenv(
+    "SLACK_WEB_HOOK_MAX_RETRIES", default="5", coalesce=int
+)
+SLACK_RETRY_BACKOFF_BASE = getenv(
+    "SLACK_RETRY_BACKOFF_BASE", default="0.5", coalesce=float
+)
+SLACK_RETRY_BACKOFF_MAX = getenv(
+    "SLACK_RETRY_BACKOFF_MAX", default="30", coalesce=float
+)
+SLACK_CHUNK_DEADLINE_MARGIN = getenv(
+    "SLACK_CHUNK_DEADLINE_MARGIN", default="15", coalesce=float
+)
+# the encoded slack payload of a menu is cached per menu version
+SLACK_MESSAGE_CACHE_TIMEOUT = getenv(
+    "SLACK_MESSAGE_CACHE_TIMEOUT", default=str(60 * 60 * 24), coalesce=int
+)
+
 # if getenv("SENTRY_DSN", default=None):
 #    sentry_sdk.init(dsn=getenv("SENTRY_DSN"), integrations=[DjangoIntegration()])
 
@@ -181,6 +347,7 @@ LOGGING = {
                 "release": os.getenv("GIT_HASH", "local"),
             },
             "encoder_class": "django.core.serializers.json.DjangoJSONEncoder",
+            "sanitize": True,
             "raise_on_format_error": DEBUG,
         },
         "simple": {
@@ -207,10 +374,13 @@ LOGGING = {
             "filters": ["require_debug_true"],
         },
         "fluent": {
-            "class": "fluent.handler.FluentHandler",
+            "class": "backend_test.logging_handler.BatchedFluentHandler",
             "host": os.getenv("FLUENT_HOST", "fluentbit"),
             "port": int(os.getenv("FLUENT_PORT", 24224)),
             "tag": os.getenv("FLUENT_TAG", "catalog"),
+            "capacity": int(os.getenv("FLUENT_BUFFER_SIZE", 10000)),
+            "batch_size": int(os.getenv("FLUENT_BATCH_SIZE", 100)),
+            "overflow": os.getenv("FLUENT_OVERFLOW", "drop_newest"),
             "formatter": "fluent_formatter",
             "level": "INFO",
         },
@@ -1,41 +1,96 @@
 import requests
 import json
 import logging
+import random
+import time
+
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
+from itertools import (
+    chain,
+    islice,
+)
+from urllib.parse import urlparse
+
+from collections import defaultdict
+
+from celery import group
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
 from backend_test.celery import app
-from .exceptions import SlackMessageException
+from .exceptions import (
+    SlackDeadlineExceeded,
+    SlackMessageException,
+)
+from .metrics import observe_cache_lookup
+from .rate_limiter import TokenBucketRateLimiter
 
-from meal_api.models import Menu
+from meal_api.models import (
+    Menu,
+    NotificationDelivery,
+)
 
 
 LOGGER = logging.getLogger(__name__)
 
+MENU_MESSAGE_CACHE_KEY = 'menu-message:{menu_id}:{menu_version}'
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
-def get_employees_slack_web_hooks(menu, iso2_code):
+
+def get_notification_recipients(menu, iso2_code):
+    """
+    Streams the ids of the employees that ordered in the menu, have the
+    given nationality and a slack web hook, resolved in a single query
+    """
     LOGGER.info(
-        "Getting slack web_hooks of employees "
-        f"with [{iso2_code}] nationality..."
+        "Getting employees with slack web_hooks "
+        f"and [{iso2_code}] nationality..."
     )
 
-    employees_slack_web_hooks = []
+    return (
+        menu.orders
+        .filter(
+            employee__nationality_id=iso2_code,
+            employee__slack_web_hook__isnull=False,
+        )
+        .values_list('employee_id', flat=True)
+        .iterator()
+    )
 
-    for order in menu.orders:
-        if order.employee.nationality.iso2_code == iso2_code:
-            employees_slack_web_hooks.append(order.employee.slack_web_hook)
 
-    return employees_slack_web_hooks
+def create_notification_deliveries(menu, iso2_code):
+    """
+    Inserts the pending outbox rows of the menu notification in batches,
+    the rows of employees that already have one are left untouched so
+    publishing again does not message the delivered employees
+    """
+    NotificationDelivery.objects.bulk_create(
+        (
+            NotificationDelivery(menu=menu, employee_id=employee_id)
+            for employee_id in get_notification_recipients(menu, iso2_code)
+        ),
+        batch_size=settings.SLACK_NOTIFICATION_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
 
 
 def generate_menu_message(menu):
     LOGGER.info("Generating menu...")
 
-    menu_meal_options = ''
-    meal_options_queryset = menu.meal_options.order_by('option_number')
-
-    for idx, meal_option in enumerate(meal_options_queryset, start=1):
-        menu_meal_options += (
-            f"Option {idx}: {meal_option.description}\n"
-        )
+    meal_options_descriptions = (
+        menu.meal_options
+        .order_by('option_number')
+        .values_list('description', flat=True)
+    )
+    menu_meal_options = ''.join(
+        f"Option {idx}: {description}\n"
+        for idx, description in enumerate(meal_options_descriptions, start=1)
+    )
 
     menu_message = (
         "Hello!\n"
@@ -47,51 +102,466 @@ def generate_menu_message(menu):
     return menu_message
 
 
-def send_slack_message(menu_message, web_hook_url):
+def encode_menu_message(menu_message):
+    """
+    Builds the json encoded slack payload of the menu message
+    """
+    return json.dumps({'text': menu_message}).encode()
+
+
+def get_menu_message_cache_key(menu_id, menu_version):
+    return MENU_MESSAGE_CACHE_KEY.format(
+        menu_id=menu_id,
+        menu_version=menu_version,
+    )
+
+
+def get_cached_menu_message_payload(menu_id, menu_version):
+    return observe_cache_lookup(
+        'menu-message',
+        cache.get(get_menu_message_cache_key(menu_id, menu_version)),
+    )
+
+
+def cache_menu_message_payload(menu):
+    """
+    Renders and encodes the menu slack payload once per menu version, the
+    version is bumped whenever the menu or its options change so the cached
+    payload is never stale. Returns the encoded payload
+    """
+    cache_key = get_menu_message_cache_key(menu.pk, menu.version)
+    menu_message_payload = observe_cache_lookup(
+        'menu-message',
+        cache.get(cache_key),
+    )
+
+    if menu_message_payload is None:
+        menu_message_payload = encode_menu_message(generate_menu_message(menu))
+        cache.set(
+            cache_key,
+            menu_message_payload,
+            timeout=settings.SLACK_MESSAGE_CACHE_TIMEOUT,
+        )
+
+    return menu_message_payload
+
+
+def send_slack_message(menu_message, web_hook_url, session=None):
+    """
+    Posts the menu message to a slack web hook, menu_message can be given
+    as text or as the payload already encoded by encode_menu_message
+    """
     headers = {
         'Content-type': 'application/json',
     }
-    payload = {
-        'text': menu_message,
-    }
 
-    response = requests.post(
+    if isinstance(menu_message, bytes):
+        payload = menu_message
+    else:
+        payload = encode_menu_message(menu_message)
+
+    response = (session or requests).post(
         url=web_hook_url,
         headers=headers,
-        data=json.dumps(payload),
+        data=payload,
+        timeout=settings.SLACK_WEB_HOOK_TIMEOUT,
     )
 
     if not response.ok:
         raise SlackMessageException(response)
 
 
+def get_slack_rate_limiter(web_hook_url):
+    """
+    Returns the rate limiter shared by every request made to the host of
+    the web hook, None when rate limiting is disabled
+    """
+    if not settings.SLACK_RATE_LIMIT:
+        return None
+
+    return TokenBucketRateLimiter(
+        name=f'slack:{urlparse(web_hook_url).netloc}',
+        rate=settings.SLACK_RATE_LIMIT,
+        capacity=settings.SLACK_RATE_LIMIT_BURST,
+    )
+
+
+def get_retry_after(slack_message_exception):
+    try:
+        return max(
+            float(slack_message_exception.response.headers['Retry-After']),
+            0,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_retry_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retrying a message, the Retry-After sent by slack
+    is honored up to SLACK_RETRY_BACKOFF_MAX, otherwise an exponential
+    backoff with full jitter is used so the retries of concurrent senders
+    are spread out
+    """
+    if retry_after is not None:
+        return min(retry_after, settings.SLACK_RETRY_BACKOFF_MAX)
+
+    return random.uniform(
+        0,
+        min(
+            settings.SLACK_RETRY_BACKOFF_MAX,
+            settings.SLACK_RETRY_BACKOFF_BASE * 2 ** attempt,
+        ),
+    )
+
+
+def deliver_slack_message(
+    menu_message,
+    web_hook_url,
+    session=None,
+    rate_limiter=None,
+    deadline=None,
+):
+    """
+    Sends the menu message taking a token from the rate limiter before every
+    attempt, 429 and 5xx responses are retried up to
+    SLACK_WEB_HOOK_MAX_RETRIES times, a Retry-After received also pauses the
+    rate limiter so every sender backs off from the host.
+    No attempt is started after the deadline (a time.monotonic() value),
+    neither waiting on the rate limiter nor on a retry, SlackDeadlineExceeded
+    is raised instead so the message is left to be sent later
+    """
+    for attempt in range(settings.SLACK_WEB_HOOK_MAX_RETRIES + 1):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise SlackDeadlineExceeded(web_hook_url)
+
+        if rate_limiter is not None and not rate_limiter.acquire(deadline):
+            raise SlackDeadlineExceeded(web_hook_url)
+
+        try:
+            return send_slack_message(menu_message, web_hook_url, session)
+        except SlackMessageException as e:
+            if (
+                e.status_code not in RETRYABLE_STATUS_CODES
+                or attempt == settings.SLACK_WEB_HOOK_MAX_RETRIES
+            ):
+                raise
+
+            retry_after = get_retry_after(e)
+            retry_delay = get_retry_delay(attempt, retry_after)
+
+            if (
+                deadline is not None
+                and time.monotonic() + max(retry_after or 0, retry_delay)
+                > deadline
+            ):
+                LOGGER.warning(
+                    f"Slack answered [{e.status_code}], giving up since "
+                    "retrying would go past the deadline..."
+                )
+                raise SlackDeadlineExceeded(web_hook_url) from e
+
+            if retry_after is not None and rate_limiter is not None:
+                rate_limiter.pause(retry_delay)
+
+            LOGGER.warning(
+                f"Slack answered [{e.status_code}], "
+                f"retrying in {retry_delay:.2f}s..."
+            )
+            time.sleep(retry_delay)
+
+
+def get_slack_session(pool_size):
+    """
+    Creates a requests session that keeps up to pool_size connections
+    alive per host, so consecutive messages reuse them
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+def send_slack_messages(
+    menu_message,
+    web_hooks_urls,
+    concurrency=None,
+    on_delivered=None,
+    deadline=None,
+):
+    """
+    Sends the menu message to every web hook concurrently, using a bounded
+    pool of threads that share a single keep-alive session and the rate
+    limiters of the slack hosts.
+    Returns the failed deliveries as (web_hook_url, exception) tuples
+    param menu_message: str or encoded payload bytes
+    param web_hooks_urls: iterable of str
+    param concurrency: int, defaults to SLACK_NOTIFICATION_CONCURRENCY
+    param on_delivered: callable, called with every delivered web hook url
+    param deadline: float, time.monotonic() value after which no message is
+    sent, the messages left are failed with SlackDeadlineExceeded
+    """
+    concurrency = concurrency or settings.SLACK_NOTIFICATION_CONCURRENCY
+    failed_deliveries = []
+    rate_limiters = {}
+
+    def get_rate_limiter(web_hook_url):
+        host = urlparse(web_hook_url).netloc
+
+        if host not in rate_limiters:
+            rate_limiters[host] = get_slack_rate_limiter(web_hook_url)
+
+        return rate_limiters[host]
+
+    with get_slack_session(concurrency) as session, ThreadPoolExecutor(
+        max_workers=concurrency,
+    ) as executor:
+        futures = {
+            executor.submit(
+                deliver_slack_message,
+                menu_message=menu_message,
+                web_hook_url=web_hook_url,
+                session=session,
+                rate_limiter=get_rate_limiter(web_hook_url),
+                deadline=deadline,
+            ): web_hook_url
+            for web_hook_url in web_hooks_urls
+        }
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                # any error fails the message alone, not its siblings
+                failed_deliveries.append((futures[future], e))
+            else:
+                if on_delivered is not None:
+                    on_delivered(futures[future])
+
+    return failed_deliveries
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def get_chunk_deadline():
+    """
+    Returns the time.monotonic() value after which a chunk task stops
+    sending messages: its celery soft time limit minus
+    SLACK_CHUNK_DEADLINE_MARGIN seconds, left for the requests in flight
+    and for saving the statuses. None when tasks have no soft time limit
+    """
+    if not app.conf.task_soft_time_limit:
+        return None
+
+    return (
+        time.monotonic()
+        + app.conf.task_soft_time_limit
+        - settings.SLACK_CHUNK_DEADLINE_MARGIN
+    )
+
+
+def dispatch_menu_notification(menu, notification_deliveries):
+    """
+    Splits the given deliveries in chunks of SLACK_NOTIFICATION_CHUNK_SIZE
+    that are sent by a group of send_menu_notification_chunk tasks, all of
+    them sharing the slack payload cached for the current menu version
+    """
+    cache_menu_message_payload(menu)
+    deliveries_ids_chunks = list(
+        chunked(
+            notification_deliveries.values_list('pk', flat=True).iterator(),
+            settings.SLACK_NOTIFICATION_CHUNK_SIZE,
+        ),
+    )
+
+    LOGGER.info(
+        f"Dispatching {len(deliveries_ids_chunks)} "
+        "slack notification chunks..."
+    )
+
+    group(
+        send_menu_notification_chunk.s(
+            menu.pk,
+            deliveries_ids_chunk,
+            menu.version,
+        )
+        for deliveries_ids_chunk in deliveries_ids_chunks
+    ).apply_async()
+
+
 @app.task
 def send_menu_notification_by_slack(menu_id, iso2_code='CL'):
     """
     Sends a slack message to all employees that have ordered in a menu,
     employees are filtered by their nationality iso2_code,
     default iso2_code value is for Chilean nationality :)
-    param menu: <Menu model object>
+    A notification delivery is recorded for every employee and the ones
+    not delivered yet are dispatched
+    param menu_id: int
     param iso2_code: str
     """
     menu = Menu.objects.get(pk=menu_id)
-    employees_slack_web_hooks = get_employees_slack_web_hooks(menu, iso2_code)
-    menu_mesage = generate_menu_message(menu)
+    create_notification_deliveries(menu, iso2_code)
+    dispatch_menu_notification(
+        menu,
+        menu.notification_deliveries
+        .claimable()
+        .filter(employee__nationality_id=iso2_code),
+    )
 
-    LOGGER.info("Sending slack messages...")
 
-    for web_hook_url in employees_slack_web_hooks:
-        try:
-            send_slack_message(
-                menu_message=menu_mesage,
-                web_hook_url=web_hook_url,
-            )
-        except SlackMessageException as e:
+@app.task
+def resend_menu_notification(menu_id):
+    """
+    Sends the menu slack message again to the employees it was not
+    delivered to, the delivered ones are not even read and the ones being
+    sent by another task are left to it
+    param menu_id: int
+    """
+    menu = Menu.objects.get(pk=menu_id)
+    dispatch_menu_notification(
+        menu,
+        menu.notification_deliveries.claimable(),
+    )
+
+
+@app.task
+def send_menu_notification_chunk(
+    menu_id,
+    notification_deliveries_ids,
+    menu_version=None,
+):
+    """
+    Sends the menu slack message to a chunk of notification deliveries, the
+    deliveries are claimed first and the ones that can't be claimed are
+    skipped: the delivered ones, so a redelivered chunk resumes instead of
+    messaging every employee again, and the ones claimed by another chunk
+    with the same deliveries, dispatched by a resend or a second publish.
+    The deliveries left claimed by a chunk that was killed are claimable
+    again after SLACK_DELIVERY_CLAIM_TIMEOUT seconds.
+    Messages are only sent until the deadline of the chunk, see
+    get_chunk_deadline, the deliveries not sent by then are left pending.
+    Statuses are saved with a bulk update every
+    SLACK_DELIVERY_STATUS_BATCH_SIZE sent messages, and once more when the
+    chunk ends, even on errors, releasing the deliveries still claimed.
+    The payload cached for menu_version is reused, it's only rendered again
+    when missing from the cache
+    param menu_id: int
+    param notification_deliveries_ids: list of int
+    param menu_version: int
+    """
+    deadline = get_chunk_deadline()
+    notification_deliveries = defaultdict(list)
+
+    for notification_delivery in (
+        NotificationDelivery.objects
+        .filter(
+            pk__in=notification_deliveries_ids,
+            employee__slack_web_hook__isnull=False,
+        )
+        .select_related('employee')
+        .claim()
+    ):
+        web_hook_url = notification_delivery.employee.slack_web_hook
+        notification_deliveries[web_hook_url].append(notification_delivery)
+
+    if not notification_deliveries:
+        return
+
+    updated_notification_deliveries = []
+
+    def save_statuses():
+        NotificationDelivery.objects.bulk_update(
+            updated_notification_deliveries,
+            ['status', 'attempts', 'last_error', 'delivered_at'],
+        )
+        updated_notification_deliveries.clear()
+
+    def update_status(web_hook_url, error=None):
+        for notification_delivery in notification_deliveries[web_hook_url]:
+            if isinstance(error, SlackDeadlineExceeded):
+                # not sent in time, left to the next run
+                notification_delivery.status = NotificationDelivery.PENDING
+                notification_delivery.last_error = str(error)
+                updated_notification_deliveries.append(notification_delivery)
+                continue
+
+            notification_delivery.attempts += 1
+
+            if error is None:
+                notification_delivery.status = NotificationDelivery.DELIVERED
+                notification_delivery.last_error = ''
+                notification_delivery.delivered_at = timezone.now()
+            else:
+                notification_delivery.status = NotificationDelivery.FAILED
+                notification_delivery.last_error = str(error)
+
+            updated_notification_deliveries.append(notification_delivery)
+
+        if (
+            len(updated_notification_deliveries)
+            >= settings.SLACK_DELIVERY_STATUS_BATCH_SIZE
+        ):
+            save_statuses()
+
+    try:
+        menu_message_payload = get_cached_menu_message_payload(
+            menu_id,
+            menu_version,
+        )
+
+        if menu_message_payload is None:
+            menu = Menu.objects.get(pk=menu_id)
+            menu_message_payload = cache_menu_message_payload(menu)
+
+        LOGGER.info("Sending slack messages...")
+
+        failed_deliveries = send_slack_messages(
+            menu_message=menu_message_payload,
+            web_hooks_urls=list(notification_deliveries),
+            on_delivered=update_status,
+            deadline=deadline,
+        )
+        deadline_exceeded_count = 0
+
+        for web_hook_url, e in failed_deliveries:
+            update_status(web_hook_url, error=e)
+
+            if isinstance(e, SlackDeadlineExceeded):
+                deadline_exceeded_count += 1
+                continue
+
             LOGGER.error(
                 "Failure when trying to send slack message",
-                exc_info=True,
+                exc_info=e,
                 extra={
                     'raised_exception': e,
+                    'slack_web_hook': web_hook_url,
                 },
             )
-            continue
+
+        if deadline_exceeded_count:
+            LOGGER.warning(
+                f"{deadline_exceeded_count} slack messages were not sent "
+                "before the chunk deadline, they are left pending"
+            )
+
+    finally:
+        # the deliveries left claimed by an error are released right away
+        for notification_delivery in chain.from_iterable(
+            notification_deliveries.values(),
+        ):
+            if notification_delivery.status == NotificationDelivery.SENDING:
+                notification_delivery.status = NotificationDelivery.PENDING
+                updated_notification_deliveries.append(notification_delivery)
+
+        save_statuses()
@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.signals import request_started
+from django.db import close_old_connections
+from mixer.backend.django import mixer
+
+from backend_test.asgi import application
+from meal_api.cache import cache_public_menu
+from meal_api.models import (
+    Menu,
+    MenuOption,
+)
+
+
+def asgi_get(path, headers=None):
+    """
+    Sends a GET request to the ASGI application, returns the response
+    status, headers and body
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+
+    async def get():
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        response_start = await communicator.receive_output(timeout=5)
+        body = b''
+        more_body = True
+
+        while more_body:
+            message = await communicator.receive_output(timeout=5)
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        await communicator.wait()
+
+        return (
+            response_start['status'],
+            {
+                name.decode().lower(): value.decode()
+                for name, value in response_start['headers']
+            },
+            body,
+        )
+
+    return async_to_sync(get)()
+
+
+@pytest.fixture(autouse=True)
+def keep_test_connection():
+    # same as the django test client, requests must not close the
+    # connection holding the test transaction
+    request_started.disconnect(close_old_connections)
+    yield
+    request_started.connect(close_old_connections)
+
+
+@pytest.fixture
+def cached_public_menu():
+    menu = mixer.blend(Menu, is_published=True)
+
+    for idx in range(1, 4):
+        mixer.blend(MenuOption, menu=menu, option_number=idx)
+
+    cache_public_menu(menu)
+
+    return menu
+
+
+@pytest.mark.django_db
+class TestAsyncViewsASGIHandler:
+
+    def test_healthz(self):
+        """
+        Tests that the healthz coroutine view answers with an http200
+        """
+        status, headers, body = asgi_get('/healthz')
+
+        assert status == 200
+        assert body == b''
+
+    def test_cached_public_menu(
+        self,
+        client,
+        cached_public_menu,
+        django_assert_num_queries,
+    ):
+        """
+        Tests that a cached public menu is served by the coroutine view
+        without querying the database, with the same body and validators as
+        PublicMenuView, and that conditional requests get an http304
+        """
+        path = f'/menu/{cached_public_menu.uuid}'
+
+        with django_assert_num_queries(0):
+            status, headers, body = asgi_get(path)
+            not_modified_status, _, not_modified_body = asgi_get(
+                path,
+                headers={'If-None-Match': headers['etag']},
+            )
+
+        sync_response = client.get(path)
+
+        assert status == 200
+        assert json.loads(body) == sync_response.json()
+        assert headers['etag'] == sync_response['ETag']
+        assert headers['cache-control'] == sync_response['Cache-Control']
+        assert headers['x-frame-options'] == sync_response['X-Frame-Options']
+        assert not_modified_status == 304
+        assert not_modified_body == b''
+
+    def test_public_menu_handed_over_to_django(self, cached_public_menu):
+        """
+        Tests that the requests the coroutine view can't serve, such as cache
+        misses or non json ones, are handled by PublicMenuView
+        """
+        not_cached_menu = mixer.blend(Menu, is_published=True)
+        not_published_menu = mixer.blend(Menu, is_published=False)
+
+        not_cached_status, _, not_cached_body = asgi_get(
+            f'/menu/{not_cached_menu.uuid}',
+        )
+        not_published_status, _, _ = asgi_get(
+            f'/menu/{not_published_menu.uuid}',
+        )
+        html_status, html_headers, _ = asgi_get(
+            f'/menu/{cached_public_menu.uuid}',
+            headers={'Accept': 'text/html'},
+        )
+
+        assert not_cached_status == 200
+        assert json.loads(not_cached_body)['Menu meal options'] == []
+        assert not_published_status == 404
+        assert html_status == 200
+        assert html_headers['content-type'].startswith('text/html')
@@ -0,0 +1,55 @@
+import pytest
+
+from mixer.backend.django import mixer
+
+from backend_test.utils.db_utils import copy_rows
+from meal_api.models import (
+    Employee,
+    Nationality,
+)
+
+
+@pytest.mark.django_db
+class TestCopyRows:
+
+    def test_copy_rows_values(self):
+        """
+        Tests that copied values come back unchanged, the ones looking like
+        the NULL marker or holding backslashes and delimiters included, and
+        that None is copied as NULL
+        """
+        nationality = mixer.blend(Nationality)
+        slack_web_hooks = [
+            None,
+            '',
+            r'\N',
+            'tab\tnew line\ncarriage return\rbackslash\\',
+        ]
+
+        copy_rows(
+            Employee,
+            (
+                'email', 'name', 'password', 'is_active', 'is_staff',
+                'is_superuser', 'slack_web_hook', 'nationality',
+            ),
+            (
+                (
+                    f'employee{idx}@copy.local',
+                    f'Employee {idx}',
+                    '',
+                    True,
+                    False,
+                    False,
+                    slack_web_hook,
+                    nationality.iso2_code,
+                )
+                for idx, slack_web_hook in enumerate(slack_web_hooks)
+            ),
+        )
+
+        assert list(
+            Employee.objects
+            .filter(email__endswith='@copy.local')
+            .order_by('email')
+            .values_list('slack_web_hook', flat=True)
+        ) == slack_web_hooks
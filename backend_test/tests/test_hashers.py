@@ -0,0 +1,60 @@
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import Client
+
+
+@pytest.fixture
+def argon2_settings(settings):
+    settings.PASSWORD_HASHERS = [
+        settings.PASSWORD_HASHERS_BY_NAME[name]
+        for name in ('argon2', 'bcrypt', 'pbkdf2')
+    ]
+    settings.ARGON2_TIME_COST = 1
+    settings.ARGON2_MEMORY_COST = 64
+    settings.ARGON2_PARALLELISM = 1
+    settings.PBKDF2_ITERATIONS = 1000
+
+    return settings
+
+
+@pytest.mark.django_db
+class TestPasswordHashers:
+
+    def test_tests_hash_with_md5(self):
+        """
+        Tests that passwords are hashed with the fast md5 hasher in the tests
+        """
+        employee = get_user_model().objects.create_employee(
+            'employee@test.local',
+            password='TEST_PASSWORD',
+            nationality=None,
+        )
+
+        assert employee.password.startswith('md5$')
+        assert employee.check_password('TEST_PASSWORD')
+
+    def test_password_is_rehashed_on_login(self, argon2_settings):
+        """
+        Tests that a password hashed by another hasher is upgraded to the
+        configured one on login, and hashed again once its cost changes
+        """
+        employee = get_user_model().objects.create(
+            email='employee@test.local',
+            password=make_password('TEST_PASSWORD', hasher='pbkdf2_sha256'),
+            nationality=None,
+        )
+        client = Client()
+
+        first_login = client.login(email=employee.email, password='TEST_PASSWORD')
+        employee.refresh_from_db()
+        upgraded_password = employee.password
+
+        argon2_settings.ARGON2_TIME_COST = 2
+        second_login = client.login(email=employee.email, password='TEST_PASSWORD')
+        employee.refresh_from_db()
+
+        assert first_login and second_login
+        assert upgraded_password.startswith('argon2$argon2i$v=19$m=64,t=1,p=1$')
+        assert employee.password.startswith('argon2$argon2i$v=19$m=64,t=2,p=1$')
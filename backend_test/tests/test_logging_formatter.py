@@ -0,0 +1,81 @@
+import datetime
+import decimal
+import enum
+import logging
+import uuid
+from collections import OrderedDict
+
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+
+from backend_test.logging_formatter import VerboseFluentRecordFormatter
+
+
+class Status(str, enum.Enum):
+    DELIVERED = 'delivered'
+
+
+def get_formatter(sanitize):
+    return VerboseFluentRecordFormatter(
+        fmt={'level': '%(levelname)s'},
+        encoder_class=DjangoJSONEncoder,
+        raise_on_format_error=True,
+        sanitize=sanitize,
+    )
+
+
+def make_record(msg, data=None):
+    record = logging.makeLogRecord({
+        'name': 'test', 'levelname': 'INFO', 'levelno': logging.INFO, 'msg': msg,
+    })
+    if data is not None:
+        record.data = data
+
+    return record
+
+
+class TestVerboseFluentRecordFormatter:
+
+    @pytest.mark.parametrize('msg, data', [
+        ('Sent menu notification', None),
+        ('Sent menu notification', 'plain'),
+        ('Sent menu notification', 12.5),
+        ({'message': 'Sent menu notification', 'attempts': 3}, None),
+        (
+            'Request went over its query budget',
+            {
+                'path': '/menu/',
+                'created_at': datetime.datetime(2020, 7, 10, 11, 30),
+                'menu_uuid': uuid.UUID('7d1f0a6e-7f4b-4b7c-9b86-3c5cdbd3d1c5'),
+                'price': decimal.Decimal('10.50'),
+                'status': Status.DELIVERED,
+                'employees': (1, 2, [3, None, True]),
+                'totals': OrderedDict([(1, 2.5), (None, False)]),
+            },
+        ),
+    ])
+    def test_sanitize_matches_json_round_trip(self, msg, data):
+        """
+        Tests that the sanitize mode produces the same record data as
+        encoding it to json and parsing it back
+        """
+        sanitized = get_formatter(sanitize=True).format(make_record(msg, data))
+        round_tripped = get_formatter(sanitize=False).format(make_record(msg, data))
+
+        assert sanitized == round_tripped
+
+    def test_sanitize_rejects_unserializable_data(self):
+        """
+        Tests that circular or unserializable data is reported as a format
+        error, same as with the json round trip
+        """
+        circular_data = {'menu': 'Corn pie'}
+        circular_data['self'] = circular_data
+        formatter = get_formatter(sanitize=True)
+
+        with pytest.raises(ValueError):
+            formatter.format(make_record('Circular', circular_data))
+        with pytest.raises(TypeError):
+            formatter.format(make_record('Unserializable', {'menu': object()}))
+        with pytest.raises(TypeError):
+            formatter.format(make_record('Unserializable key', {(1, 2): 'menu'}))
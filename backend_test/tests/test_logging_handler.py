@@ -0,0 +1,112 @@
+import logging
+
+import pytest
+from fluent.handler import FluentRecordFormatter
+
+from backend_test.logging_handler import (
+    DROP_NEWEST,
+    DROP_OLDEST,
+    BatchedFluentHandler,
+)
+
+
+def get_logger(handler):
+    handler.setFormatter(FluentRecordFormatter({'level': '%(levelname)s'}))
+    logger = logging.getLogger('test-batched-fluent-handler')
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    return logger
+
+
+class TestBatchedFluentHandler:
+
+    def test_records_are_shipped_in_batches(self, fluent_stub_server):
+        """
+        Tests that logged records are shipped to fluent in forward mode
+        batches over a single connection
+        """
+        handler = BatchedFluentHandler(
+            'test',
+            host=fluent_stub_server.host,
+            port=fluent_stub_server.port,
+            batch_size=10,
+        )
+        logger = get_logger(handler)
+
+        for idx in range(50):
+            logger.info(f'record {idx}')
+        handler.flush()
+        handler.close()
+        fluent_stub_server.wait_for_records(50)
+
+        received_records = fluent_stub_server.received_records
+
+        assert handler.sent_count == 50
+        assert handler.dropped_count == handler.failed_count == 0
+        assert [record['message'] for record in received_records] == [
+            f'record {idx}' for idx in range(50)
+        ]
+        assert {record['level'] for record in received_records} == {'INFO'}
+        assert all(tag == 'test' for tag, _ in fluent_stub_server.received_messages)
+        assert len(fluent_stub_server.received_messages) < 50
+        assert fluent_stub_server.connections_count == 1
+
+    @pytest.mark.parametrize('overflow, expected_messages', [
+        (DROP_NEWEST, [f'record {idx}' for idx in range(5)]),
+        (DROP_OLDEST, [f'record {idx}' for idx in range(15, 20)]),
+    ])
+    def test_overflowing_records_are_dropped(
+        self,
+        fluent_stub_server,
+        overflow,
+        expected_messages,
+    ):
+        """
+        Tests that once the buffer is full records are dropped according to
+        the overflow policy and counted, without blocking the caller
+        """
+        handler = BatchedFluentHandler(
+            'test',
+            host=fluent_stub_server.host,
+            port=fluent_stub_server.port,
+            capacity=5,
+            overflow=overflow,
+        )
+        logger = get_logger(handler)
+
+        # holding the handler lock keeps the sender from draining the buffer
+        with handler._condition:
+            handler._start_sender()
+            for idx in range(20):
+                handler.emit(logger.makeRecord(
+                    logger.name, logging.INFO, __file__, 0, f'record {idx}', (), None,
+                ))
+        handler.flush()
+        handler.close()
+        fluent_stub_server.wait_for_records(5)
+
+        assert handler.dropped_count == 15
+        assert handler.sent_count == 5
+        assert [
+            record['message'] for record in fluent_stub_server.received_records
+        ] == expected_messages
+
+    def test_unreachable_fluent_records_are_counted(self, fluent_stub_server):
+        """
+        Tests that records which could not be shipped are counted as failed
+        and logging keeps going
+        """
+        host, port = fluent_stub_server.host, fluent_stub_server.port
+        fluent_stub_server.stop()
+        handler = BatchedFluentHandler('test', host=host, port=port, timeout=0.5)
+        logger = get_logger(handler)
+
+        for idx in range(10):
+            logger.info(f'record {idx}')
+        handler.flush()
+        handler.close()
+
+        assert handler.failed_count == 10
+        assert handler.sent_count == 0
@@ -0,0 +1,106 @@
+import pytest
+
+from django.urls import reverse
+from mixer.backend.django import mixer
+from prometheus_client import REGISTRY
+
+from meal_api.models import Menu
+
+
+def get_sample_value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_metrics(self, client):
+        """
+        Tests that the latency and database queries of the requests are
+        recorded by view along with the lookups of the public menu cache,
+        and that they are exposed on the metrics endpoint
+        """
+        menu = mixer.blend(Menu, is_published=True)
+        request_url = reverse('public-menu', args=(menu.uuid,))
+        view_labels = {'view': 'PublicMenuView', 'route': 'public-menu'}
+        requests_count = get_sample_value(
+            'http_request_duration_seconds_count',
+            method='GET',
+            status='200',
+            **view_labels,
+        )
+        queries_sum = get_sample_value(
+            'http_request_db_queries_sum',
+            **view_labels,
+        )
+        cache_misses = get_sample_value(
+            'cache_lookups_total',
+            cache='public-menu',
+            result='miss',
+        )
+        cache_hits = get_sample_value(
+            'cache_lookups_total',
+            cache='public-menu',
+            result='hit',
+        )
+
+        client.get(request_url)
+        client.get(request_url)
+        response = client.get(reverse('metrics'))
+
+        assert response.status_code == 200
+        assert b'http_request_duration_seconds_bucket' in response.content
+        assert get_sample_value(
+            'http_request_duration_seconds_count',
+            method='GET',
+            status='200',
+            **view_labels,
+        ) == requests_count + 2
+        # the menu and its options are only queried on the cache miss
+        assert get_sample_value(
+            'http_request_db_queries_sum',
+            **view_labels,
+        ) == queries_sum + 2
+        assert get_sample_value(
+            'cache_lookups_total',
+            cache='public-menu',
+            result='miss',
+        ) == cache_misses + 1
+        assert get_sample_value(
+            'cache_lookups_total',
+            cache='public-menu',
+            result='hit',
+        ) == cache_hits + 1
+
+    def test_metrics_access(self, client, settings):
+        """
+        Tests that the metrics are only served to the allowed networks and
+        to the requests sending the metrics token
+        """
+        settings.METRICS_TOKEN = 'TEST_TOKEN'
+        settings.METRICS_ALLOWED_NETWORKS = ['10.0.0.0/8']
+        request_url = reverse('metrics')
+
+        allowed_network_response = client.get(
+            request_url,
+            REMOTE_ADDR='10.1.2.3',
+        )
+        other_network_response = client.get(
+            request_url,
+            REMOTE_ADDR='192.0.2.1',
+        )
+        token_response = client.get(
+            request_url,
+            REMOTE_ADDR='192.0.2.1',
+            HTTP_AUTHORIZATION='Bearer TEST_TOKEN',
+        )
+        wrong_token_response = client.get(
+            request_url,
+            REMOTE_ADDR='192.0.2.1',
+            HTTP_AUTHORIZATION='Bearer WRONG_TOKEN',
+        )
+
+        assert allowed_network_response.status_code == 200
+        assert other_network_response.status_code == 403
+        assert token_response.status_code == 200
+        assert wrong_token_response.status_code == 403
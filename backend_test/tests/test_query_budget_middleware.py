@@ -0,0 +1,137 @@
+import logging
+from datetime import time
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from mixer.backend.django import mixer
+from mockito import (
+    when,
+    unstub,
+)
+from rest_framework import status
+
+from backend_test.middleware import (
+    MetricsMiddleware,
+    QueryBudgetMiddleware,
+)
+from backend_test.utils import datetime_utils
+from meal_api.models import (
+    Menu,
+    Nationality,
+)
+
+
+@pytest.mark.django_db
+class TestQueryBudgetMiddleware:
+
+    def test_query_budget(self, caplog, client, settings):
+        """
+        Tests that requests going over the query budget of their view are
+        logged as warnings with their database usage, the ones within it are
+        not, and that the Server-Timing header is added when enabled
+        """
+        settings.SERVER_TIMING_HEADER = True
+        settings.QUERY_BUDGETS = {'public-menu': {'queries': 1}}
+        menu = mixer.blend(Menu, is_published=True)
+        request_url = reverse('public-menu', args=(menu.uuid,))
+
+        with caplog.at_level(logging.WARNING, logger='backend_test.middleware'):
+            # cache miss, the menu and its options are queried
+            over_budget_response = client.get(request_url)
+            within_budget_response = client.get(request_url)
+
+        warnings = [
+            record
+            for record in caplog.records
+            if record.name == 'backend_test.middleware'
+        ]
+
+        assert len(warnings) == 1
+        assert warnings[0].data['route'] == 'public-menu'
+        assert warnings[0].data['queries'] == 2
+        assert warnings[0].data['queries_budget'] == 1
+        assert over_budget_response['Server-Timing'].startswith('db;dur=')
+        assert 'desc="2 queries"' in over_budget_response['Server-Timing']
+        assert 'desc="0 queries"' in within_budget_response['Server-Timing']
+
+    @pytest.mark.parametrize('route, request_method', [
+        ('public-menu', 'get'),
+        ('meal_api:order-list', 'post'),
+    ])
+    def test_configured_query_budgets(
+        self,
+        caplog,
+        client,
+        django_assert_num_queries,
+        settings,
+        route,
+        request_method,
+    ):
+        """
+        Tests that the configured budgets match the queries of their views
+        in the worst case they describe: a session read from the database,
+        the user lookup and a public menu cache miss
+        """
+        settings.SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+        menu = mixer.blend(Menu, is_published=True)
+        request_url = (
+            reverse(route, args=(menu.uuid,))
+            if route == 'public-menu'
+            else reverse(route)
+        )
+        payload = {
+            'selected_option': 1,
+            'customizations': 'TEST',
+            'menu': menu.uuid,
+        }
+        client.force_login(
+            mixer.blend(
+                get_user_model(),
+                nationality=mixer.blend(Nationality),
+            ),
+        )
+        when(datetime_utils).get_time_now(...).thenReturn(time(hour=10))
+
+        with caplog.at_level(logging.WARNING, logger='backend_test.middleware'):
+            with django_assert_num_queries(
+                settings.QUERY_BUDGETS[route]['queries'],
+            ):
+                response = getattr(client, request_method)(
+                    request_url,
+                    payload,
+                )
+        unstub()
+
+        assert response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_201_CREATED,
+        )
+        assert not [
+            record
+            for record in caplog.records
+            if record.name == 'backend_test.middleware'
+        ]
+
+    def test_single_query_counter_per_request(self):
+        """
+        Tests that the metrics and the query budget middleware share the
+        query counter of the request, so queries go through one wrapper
+        """
+        execute_wrappers_counts = []
+
+        def get_response(request):
+            execute_wrappers_counts.append(len(connection.execute_wrappers))
+            Menu.objects.exists()
+
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        MetricsMiddleware(QueryBudgetMiddleware(get_response))(request)
+
+        assert execute_wrappers_counts == [1]
+        assert request.query_counter.count == 1
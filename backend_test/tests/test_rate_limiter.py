@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from backend_test.rate_limiter import TokenBucketRateLimiter
+
+
+@pytest.mark.django_db
+class TestTokenBucketRateLimiter:
+
+    def test_rate_limiter_bursts_and_refills(self):
+        """
+        Tests that the rate limiter hands out up to capacity tokens at once
+        and then refills them at the configured rate
+        """
+        rate_limiter = TokenBucketRateLimiter('test', rate=100, capacity=5)
+
+        burst_waits = [rate_limiter.try_acquire() for _ in range(5)]
+        throttled_wait = rate_limiter.try_acquire()
+
+        started_at = time.perf_counter()
+        for _ in range(10):
+            rate_limiter.acquire()
+        elapsed = time.perf_counter() - started_at
+
+        assert burst_waits == [0] * 5
+        assert 0 < throttled_wait <= 0.01
+        assert elapsed >= 0.08
+
+    def test_rate_limiter_is_shared_and_paused(self):
+        """
+        Tests that rate limiters with the same name draw from the same
+        bucket, that pausing one of them stops handing out tokens and that
+        acquiring gives up right away when no token comes before the deadline
+        """
+        rate_limiter = TokenBucketRateLimiter('test', rate=1, capacity=1)
+        other_rate_limiter = TokenBucketRateLimiter('test', rate=1, capacity=1)
+
+        first_wait = rate_limiter.try_acquire()
+        shared_wait = other_rate_limiter.try_acquire()
+
+        rate_limiter.pause(10)
+        paused_wait = other_rate_limiter.try_acquire()
+        started_at = time.perf_counter()
+        acquired = other_rate_limiter.acquire(deadline=time.monotonic() + 1)
+        elapsed = time.perf_counter() - started_at
+
+        assert first_wait == 0
+        assert 0 < shared_wait <= 1
+        assert 9 < paused_wait <= 10
+        assert not acquired
+        assert elapsed < 0.5
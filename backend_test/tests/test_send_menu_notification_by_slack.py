@@ -1,6 +1,12 @@
+import time
+from datetime import timedelta
+
 import pytest
 import requests
 
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from mixer.backend.django import mixer
 from mockito import (
     when,
     mock,
@@ -8,12 +14,27 @@ from mockito import (
 )
 
 from backend_test.tasks import (
+    cache_menu_message_payload,
+    create_notification_deliveries,
+    deliver_slack_message,
     generate_menu_message,
-    get_employees_slack_web_hooks,
+    get_notification_recipients,
+    send_menu_notification_chunk,
     send_slack_message,
+    send_slack_messages,
+)
+from backend_test import tasks
+from backend_test.celery import app
+from backend_test.exceptions import (
+    SlackDeadlineExceeded,
+    SlackMessageException,
+)
+from meal_api.models import (
+    Employee,
+    Nationality,
+    NotificationDelivery,
+    Order,
 )
-from backend_test.exceptions import SlackMessageException
-from meal_api.models import Employee
 
 
 @pytest.mark.django_db
@@ -44,21 +65,22 @@ class TestSlackMenuNotificationTest:
 
         unstub()
 
-    def test_get_employees_slack_web_hooks(
+    def test_get_notification_recipients(
         self,
         menu_with_various_employees_nationalities_orders,
     ):
         """
-        Tests that the slack_web_hooks retrieved by the
-        get_employees_slack_web_hooks function just get the slack web hooks of
-        the employees with the nationality specified on the method's iso2_code
-        parameter
+        Tests that the employees retrieved by the get_notification_recipients
+        function are just the employees with the nationality specified on the
+        method's iso2_code parameter
         """
         expected_nationality = 'CL'
 
-        employees_slack_web_hooks = get_employees_slack_web_hooks(
-            menu=menu_with_various_employees_nationalities_orders,
-            iso2_code=expected_nationality,
+        employees_ids = list(
+            get_notification_recipients(
+                menu=menu_with_various_employees_nationalities_orders,
+                iso2_code=expected_nationality,
+            ),
         )
 
         # Will hold a boolean value for each returned employee nationality
@@ -66,8 +88,8 @@ class TestSlackMenuNotificationTest:
         # nationality i.e [True, False, True, True...]
         employee_matched_nationalities = []
 
-        for slack_web_hook in employees_slack_web_hooks:
-            employee = Employee.objects.get(slack_web_hook=slack_web_hook)
+        for employee_id in employees_ids:
+            employee = Employee.objects.get(pk=employee_id)
             employee_matches_expected_nationality = (
                 employee.nationality.iso2_code
                 == expected_nationality
@@ -76,8 +98,64 @@ class TestSlackMenuNotificationTest:
                 employee_matches_expected_nationality,
             )
 
+        assert len(employees_ids) == 10
         assert all(employee_matched_nationalities)
 
+    def test_get_notification_recipients_query_count(
+        self,
+        django_assert_num_queries,
+        menu_with_various_employees_nationalities_orders,
+    ):
+        """
+        Tests that the recipients are resolved with a single query,
+        no matter how many orders the menu has
+        """
+        menu = menu_with_various_employees_nationalities_orders
+
+        with django_assert_num_queries(1):
+            recipients = list(get_notification_recipients(menu, 'CL'))
+
+        for _ in range(10):
+            mixer.blend(
+                Order,
+                employee=mixer.blend(
+                    get_user_model(),
+                    nationality=Nationality.objects.get(iso2_code='CL'),
+                ),
+                menu=menu,
+            )
+
+        with django_assert_num_queries(1):
+            more_recipients = list(get_notification_recipients(menu, 'CL'))
+
+        assert len(recipients) == 10
+        assert len(more_recipients) == 20
+
+    def test_create_notification_deliveries(
+        self,
+        menu_with_various_employees_nationalities_orders,
+    ):
+        """
+        Tests that a pending notification delivery is created for every
+        recipient and that creating them again keeps the existing ones
+        along with their status
+        """
+        menu = menu_with_various_employees_nationalities_orders
+
+        create_notification_deliveries(menu, 'CL')
+        menu.notification_deliveries.filter(
+            pk=menu.notification_deliveries.first().pk,
+        ).update(status=NotificationDelivery.DELIVERED)
+        create_notification_deliveries(menu, 'CL')
+
+        assert menu.notification_deliveries.get_progress() == {
+            'total': 10,
+            'delivered': 1,
+            'failed': 0,
+            'pending': 9,
+            'sending': 0,
+        }
+
     def test_generate_menu_message(self, menu_with_meal_options):
         """
         Tests that the menu notifications message is build correctly
@@ -100,3 +178,383 @@ class TestSlackMenuNotificationTest:
             expected_notification_message
             == generate_menu_message(menu=menu_with_meal_options)
         )
+
+    def test_send_slack_messages_concurrently(self, slack_stub_server):
+        """
+        Tests that send_slack_messages delivers the message to every web hook
+        reusing keep-alive connections, and that the web hooks that could not
+        be reached are reported back along with the raised exception
+        """
+        concurrency = 4
+        failing_web_hook_url = slack_stub_server.get_web_hook_url('failing')
+        slack_stub_server.responses['/services/failing'].append(404)
+        web_hooks_urls = [
+            slack_stub_server.get_web_hook_url(idx)
+            for idx in range(40)
+        ]
+
+        failed_deliveries = send_slack_messages(
+            menu_message='TEST_VALUE',
+            web_hooks_urls=web_hooks_urls + [failing_web_hook_url],
+            concurrency=concurrency,
+        )
+
+        assert slack_stub_server.delivered_count == len(web_hooks_urls)
+        assert slack_stub_server.connections_count <= concurrency
+        assert len(failed_deliveries) == 1
+        assert failed_deliveries[0][0] == failing_web_hook_url
+        assert isinstance(failed_deliveries[0][1], SlackMessageException)
+
+    def test_send_menu_notification_chunk_resumes(
+        self,
+        django_assert_num_queries,
+        menu_with_meal_options,
+        notification_deliveries,
+        settings,
+        slack_stub_server,
+    ):
+        """
+        Tests that a redelivered notification chunk only messages the
+        employees that were not delivered on the previous run, and that the
+        delivery statuses are saved in batches
+        """
+        settings.SLACK_DELIVERY_STATUS_BATCH_SIZE = 4
+        menu = menu_with_meal_options
+        notification_deliveries_ids = [
+            notification_delivery.pk
+            for notification_delivery in notification_deliveries
+        ]
+        # the first web hook fails on the first attempt only, 404 responses
+        # are not retried
+        slack_stub_server.responses['/services/0'].append(404)
+
+        # deliveries claim select and update within a savepoint, menu
+        # message and 3 bulk updates
+        with django_assert_num_queries(4 + 2 + 3):
+            send_menu_notification_chunk(menu.pk, notification_deliveries_ids)
+        first_run_progress = menu.notification_deliveries.get_progress()
+
+        send_menu_notification_chunk(menu.pk, notification_deliveries_ids)
+        second_run_progress = menu.notification_deliveries.get_progress()
+        failed_first_notification_delivery = NotificationDelivery.objects.get(
+            pk=notification_deliveries[0].pk,
+        )
+
+        assert first_run_progress == {
+            'total': 10,
+            'delivered': 9,
+            'failed': 1,
+            'pending': 0,
+            'sending': 0,
+        }
+        assert second_run_progress == {
+            'total': 10,
+            'delivered': 10,
+            'failed': 0,
+            'pending': 0,
+            'sending': 0,
+        }
+        assert failed_first_notification_delivery.attempts == 2
+        assert failed_first_notification_delivery.delivered_at is not None
+        assert slack_stub_server.requests_count == len(notification_deliveries) + 1
+        assert slack_stub_server.delivered_count == len(notification_deliveries)
+
+    def test_send_menu_notification_chunk_skips_claimed_deliveries(
+        self,
+        menu_with_meal_options,
+        notification_deliveries,
+        settings,
+        slack_stub_server,
+    ):
+        """
+        Tests that a chunk skips the deliveries claimed by another chunk so
+        their employees are not messaged twice, and that deliveries left
+        claimed past the claim timeout are sent again
+        """
+        menu = menu_with_meal_options
+        notification_deliveries_ids = [
+            notification_delivery.pk
+            for notification_delivery in notification_deliveries
+        ]
+        claimed_notification_deliveries = NotificationDelivery.objects.filter(
+            pk__in=notification_deliveries_ids[:4],
+        )
+        claimed_notification_deliveries.claim()
+
+        send_menu_notification_chunk(menu.pk, notification_deliveries_ids)
+        first_run_progress = menu.notification_deliveries.get_progress()
+
+        claimed_notification_deliveries.update(
+            claimed_at=timezone.now() - timedelta(
+                seconds=settings.SLACK_DELIVERY_CLAIM_TIMEOUT + 1,
+            ),
+        )
+        send_menu_notification_chunk(menu.pk, notification_deliveries_ids)
+        second_run_progress = menu.notification_deliveries.get_progress()
+
+        assert first_run_progress == {
+            'total': 10,
+            'delivered': 6,
+            'failed': 0,
+            'pending': 0,
+            'sending': 4,
+        }
+        assert second_run_progress['delivered'] == 10
+        assert slack_stub_server.delivered_count == len(notification_deliveries)
+
+    def test_send_menu_notification_chunk_unexpected_errors(
+        self,
+        menu_with_meal_options,
+        notification_deliveries,
+        slack_stub_server,
+    ):
+        """
+        Tests that an unexpected error sending a message only fails its
+        delivery, and that an error raised out of the chunk still saves the
+        statuses and releases the claimed deliveries
+        """
+        menu = menu_with_meal_options
+        notification_deliveries_ids = [
+            notification_delivery.pk
+            for notification_delivery in notification_deliveries
+        ]
+        broken_web_hook_url = slack_stub_server.get_web_hook_url(0)
+
+        def send_or_break(menu_message, web_hook_url, session=None):
+            if web_hook_url == broken_web_hook_url:
+                raise RuntimeError('Redis is down')
+
+            return send_slack_message(menu_message, web_hook_url, session)
+
+        when(tasks).send_slack_message(...).thenAnswer(send_or_break)
+
+        send_menu_notification_chunk(
+            menu.pk,
+            notification_deliveries_ids[:5],
+        )
+        unstub()
+        first_run_progress = menu.notification_deliveries.get_progress()
+        broken_notification_delivery = NotificationDelivery.objects.get(
+            pk=notification_deliveries[0].pk,
+        )
+
+        when(tasks).send_slack_messages(...).thenRaise(
+            RuntimeError('Unexpected error'),
+        )
+        with pytest.raises(RuntimeError):
+            send_menu_notification_chunk(
+                menu.pk,
+                notification_deliveries_ids[5:],
+            )
+        unstub()
+        second_run_progress = menu.notification_deliveries.get_progress()
+
+        assert first_run_progress == {
+            'total': 10,
+            'delivered': 4,
+            'failed': 1,
+            'pending': 5,
+            'sending': 0,
+        }
+        assert broken_notification_delivery.last_error == 'Redis is down'
+        assert second_run_progress == {
+            'total': 10,
+            'delivered': 4,
+            'failed': 1,
+            'pending': 5,
+            'sending': 0,
+        }
+
+    def test_send_menu_notification_chunk_reuses_cached_payload(
+        self,
+        django_assert_num_queries,
+        menu_with_meal_options,
+        notification_deliveries,
+        slack_stub_server,
+    ):
+        """
+        Tests that the slack payload is rendered once per menu version and
+        that the notification chunks reuse the cached payload without
+        querying the menu again
+        """
+        menu = menu_with_meal_options
+        notification_deliveries_ids = [
+            notification_delivery.pk
+            for notification_delivery in notification_deliveries
+        ]
+        menu_message = generate_menu_message(menu)
+        menu_message_payload = cache_menu_message_payload(menu)
+
+        # deliveries claim select and update within a savepoint and
+        # statuses bulk update
+        with django_assert_num_queries(4 + 1):
+            send_menu_notification_chunk(
+                menu.pk,
+                notification_deliveries_ids,
+                menu.version,
+            )
+
+        delivered_payloads = slack_stub_server.received_payloads['/services/0']
+
+        menu.meal_options.filter(option_number=1).update(description='Soup')
+        menu.touch()
+
+        assert delivered_payloads == [{'text': menu_message}]
+        assert cache_menu_message_payload(menu) != menu_message_payload
+
+    def test_deliver_slack_message_retries(self, settings, slack_stub_server):
+        """
+        Tests that 429 and 5xx responses are retried honoring the Retry-After
+        header, that other errors are raised right away and that the error
+        is raised once the retries are exhausted
+        """
+        settings.SLACK_WEB_HOOK_MAX_RETRIES = 2
+        settings.SLACK_RETRY_BACKOFF_BASE = 0.01
+        slack_stub_server.responses['/services/throttled'].extend(
+            [(429, {'Retry-After': '0'}), 503],
+        )
+        slack_stub_server.responses['/services/missing'].append(404)
+        slack_stub_server.responses['/services/down'].extend([500] * 3)
+
+        deliver_slack_message(
+            'TEST_VALUE',
+            slack_stub_server.get_web_hook_url('throttled'),
+        )
+
+        with pytest.raises(SlackMessageException) as missing_exception:
+            deliver_slack_message(
+                'TEST_VALUE',
+                slack_stub_server.get_web_hook_url('missing'),
+            )
+
+        with pytest.raises(SlackMessageException) as down_exception:
+            deliver_slack_message(
+                'TEST_VALUE',
+                slack_stub_server.get_web_hook_url('down'),
+            )
+
+        assert slack_stub_server.received_payloads['/services/throttled'] == [
+            {'text': 'TEST_VALUE'},
+        ]
+        assert missing_exception.value.status_code == 404
+        assert down_exception.value.status_code == 500
+        assert slack_stub_server.requests_count == 3 + 1 + 3
+
+    def test_deliver_slack_message_deadline(self, settings, slack_stub_server):
+        """
+        Tests that the Retry-After sent by slack is capped by the maximum
+        backoff, that a message asked to wait past the deadline gives up
+        right away instead of waiting, and that no attempt is made once the
+        deadline has passed
+        """
+        settings.SLACK_RETRY_BACKOFF_MAX = 0.1
+        slack_stub_server.responses['/services/throttled'].append(
+            (429, {'Retry-After': '0.5'}),
+        )
+        slack_stub_server.responses['/services/blocked'].append(
+            (429, {'Retry-After': '3600'}),
+        )
+
+        started_at = time.perf_counter()
+        deliver_slack_message(
+            'TEST_VALUE',
+            slack_stub_server.get_web_hook_url('throttled'),
+            deadline=time.monotonic() + 1,
+        )
+        throttled_elapsed = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        with pytest.raises(SlackDeadlineExceeded) as blocked_exception:
+            deliver_slack_message(
+                'TEST_VALUE',
+                slack_stub_server.get_web_hook_url('blocked'),
+                deadline=time.monotonic() + 1,
+            )
+        blocked_elapsed = time.perf_counter() - started_at
+
+        with pytest.raises(SlackDeadlineExceeded):
+            deliver_slack_message(
+                'TEST_VALUE',
+                slack_stub_server.get_web_hook_url('late'),
+                deadline=time.monotonic(),
+            )
+
+        assert 0.1 <= throttled_elapsed < 0.5
+        assert blocked_exception.value.__cause__.status_code == 429
+        assert blocked_elapsed < 0.5
+        assert slack_stub_server.requests_count == 2 + 1
+
+    def test_send_menu_notification_chunk_deadline(
+        self,
+        menu_with_meal_options,
+        notification_deliveries,
+        settings,
+        slack_stub_server,
+    ):
+        """
+        Tests that a chunk stops sending at its deadline, waiting neither on
+        retries nor on the rate limiter past it, and that the deliveries not
+        sent by then are left pending for the next run
+        """
+        # the chunk deadline is half a second after it starts
+        settings.SLACK_CHUNK_DEADLINE_MARGIN = (
+            app.conf.task_soft_time_limit - 0.5
+        )
+        settings.SLACK_RATE_LIMIT = 2
+        settings.SLACK_RATE_LIMIT_BURST = 5
+        menu = menu_with_meal_options
+        notification_deliveries_ids = [
+            notification_delivery.pk
+            for notification_delivery in notification_deliveries
+        ]
+        slack_stub_server.responses['/services/0'].append(
+            (429, {'Retry-After': '3600'}),
+        )
+
+        started_at = time.perf_counter()
+        send_menu_notification_chunk(menu.pk, notification_deliveries_ids)
+        elapsed = time.perf_counter() - started_at
+        progress = menu.notification_deliveries.get_progress()
+        throttled_notification_delivery = NotificationDelivery.objects.get(
+            pk=notification_deliveries[0].pk,
+        )
+
+        assert elapsed < 2
+        # the rate limiter burst, one of them taken by the throttled web hook
+        assert progress == {
+            'total': 10,
+            'delivered': 4,
+            'failed': 0,
+            'pending': 6,
+            'sending': 0,
+        }
+        assert throttled_notification_delivery.attempts == 0
+        assert 'deadline' in throttled_notification_delivery.last_error
+
+    def test_send_slack_messages_rate_limited(self, settings, slack_stub_server):
+        """
+        Tests that messages are sent at the configured rate and that a
+        throttled web hook is delivered once slack lets it through
+        """
+        settings.SLACK_RATE_LIMIT = 100
+        settings.SLACK_RATE_LIMIT_BURST = 5
+        slack_stub_server.responses['/services/0'].append(
+            (429, {'Retry-After': '0.1'}),
+        )
+        web_hooks_urls = [
+            slack_stub_server.get_web_hook_url(idx)
+            for idx in range(20)
+        ]
+
+        started_at = time.perf_counter()
+        failed_deliveries = send_slack_messages(
+            menu_message='TEST_VALUE',
+            web_hooks_urls=web_hooks_urls,
+            concurrency=4,
+        )
+        elapsed = time.perf_counter() - started_at
+
+        assert failed_deliveries == []
+        assert slack_stub_server.delivered_count == len(web_hooks_urls)
+        # 21 requests, 5 of them in the initial burst
+        assert elapsed >= 0.15
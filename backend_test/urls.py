@@ -14,12 +14,21 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.urls import path, include
-from meal_api.views import PublicMenuView
-from .utils.healthz import healthz
+from meal_api.views import PublicMenuView, async_public_menu_view
+from .metrics import metrics
+from .utils.healthz import async_healthz, healthz
 
 urlpatterns = [
     path("healthz", healthz, name="healthz"),
+    path("metrics", metrics, name="metrics"),
     path("api/v1/", include('meal_api.urls')),
     path("auth/", include('rest_framework.urls')),
     path(r'menu/<uuid:menu_uuid>', PublicMenuView.as_view(), name='public-menu'),
 ]
+
+# coroutine views served under ASGI (see backend_test.asgi) before the ones
+# above, a view returning None hands the request over to the sync stack
+async_urlpatterns = [
+    path("healthz", async_healthz),
+    path(r'menu/<uuid:menu_uuid>', async_public_menu_view),
+]
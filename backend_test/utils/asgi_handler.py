@@ -0,0 +1,77 @@
+import io
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import Resolver404, URLResolver
+from django.urls.resolvers import RegexPattern
+from django.utils.module_loading import import_string
+
+from .async_redis import close_async_redis_connections
+
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """
+    Django ASGI handler that serves the GET/HEAD requests matching
+    async_urlpatterns with their coroutine views right on the event loop.
+    A coroutine view may return None to hand the request over to the
+    regular django stack, which runs the sync views in a thread.
+    Responses of coroutine views only go through ASYNC_VIEWS_MIDDLEWARE
+    """
+
+    def __init__(self, async_urlpatterns):
+        super().__init__()
+        self.async_resolver = URLResolver(RegexPattern(r"^/"), async_urlpatterns)
+        self.async_views_middleware = [
+            import_string(middleware_path)
+            for middleware_path in reversed(settings.ASYNC_VIEWS_MIDDLEWARE)
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.handle_lifespan(receive, send)
+            return
+
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            response = await self.get_async_view_response(scope)
+
+            if response is not None:
+                await self.send_response(response, send)
+                return
+
+        await super().__call__(scope, receive, send)
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_redis_connections()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def get_async_view_response(self, scope):
+        try:
+            resolver_match = self.async_resolver.resolve(scope["path"])
+        except Resolver404:
+            return None
+
+        request = self.request_class(scope, io.BytesIO())
+        response = await resolver_match.func(
+            request, *resolver_match.args, **resolver_match.kwargs
+        )
+
+        if response is None:
+            return None
+
+        return self.process_async_view_response(request, response)
+
+    def process_async_view_response(self, request, response):
+        def get_response(request):
+            return response
+
+        for middleware_class in self.async_views_middleware:
+            get_response = middleware_class(get_response)
+
+        return get_response(request)
@@ -0,0 +1,29 @@
+"""
+Asyncio redis clients for the coroutine views served under ASGI, they
+connect to the same redis as the django cache. Connections are bound to the
+event loop they were opened in, so a client is kept per running loop.
+"""
+import asyncio
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+from redis import asyncio as aioredis
+
+_clients = WeakKeyDictionary()
+
+
+def get_async_redis_connection(alias="default"):
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.setdefault(loop, {})
+
+    if alias not in loop_clients:
+        loop_clients[alias] = aioredis.from_url(settings.CACHES[alias]["LOCATION"])
+
+    return loop_clients[alias]
+
+
+async def close_async_redis_connections():
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+
+    for client in loop_clients.values():
+        await client.connection_pool.disconnect()
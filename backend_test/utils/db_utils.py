@@ -0,0 +1,104 @@
+import io
+import time
+from itertools import islice
+from operator import attrgetter
+
+from django.db import connection
+from psycopg2 import errorcodes
+
+
+def is_unique_violation(integrity_error):
+    """
+    Tells whether an IntegrityError raised by the database was caused by a
+    unique constraint, as opposed to i.e a not null or a foreign key one
+    """
+    return (
+        getattr(integrity_error.__cause__, "pgcode", None)
+        == errorcodes.UNIQUE_VIOLATION
+    )
+
+
+def iterate_in_batches(queryset, batch_size, get_pk=attrgetter("pk")):
+    """
+    Iterates over the queryset fetching batch_size rows at a time, batches
+    are paginated by primary key (keyset) so memory stays flat without
+    relying on server side cursors, which are disabled for the database.
+    get_pk must return the primary key of the rows yielded by the queryset,
+    i.e itemgetter("id") for querysets of dicts
+    """
+    queryset = queryset.order_by("pk")
+    batch = list(queryset[:batch_size])
+
+    while batch:
+        yield from batch
+        batch = list(queryset.filter(pk__gt=get_pk(batch[-1]))[:batch_size])
+
+
+COPY_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+})
+
+
+def get_copy_value(value):
+    """
+    Formats a value for the text format of the COPY command, None is copied
+    as NULL (\\N) and the backslashes and delimiters of the values are
+    escaped, so no value is ever read as NULL or split
+    """
+    if value is None:
+        return "\\N"
+
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_rows(model, field_names, rows, batch_size=100000):
+    """
+    Inserts the rows, tuples of values of the given model fields, with the
+    postgres COPY command, which is several times faster than even bulk
+    inserts. Rows are streamed batch_size at a time, None is copied as NULL
+    """
+    columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(field_name).column)
+        for field_name in field_names
+    )
+    copy_sql = (
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+        "FROM STDIN WITH (FORMAT text)"
+    )
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+
+    with connection.cursor() as cursor:
+        while batch:
+            buffer = io.StringIO(
+                "".join(
+                    "\t".join(get_copy_value(value) for value in row) + "\n"
+                    for row in batch
+                )
+            )
+            cursor.copy_expert(copy_sql, buffer)
+            batch = list(islice(rows, batch_size))
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts the queries run through it and the
+    time spent on them, i.e:
+        with connection.execute_wrapper(query_counter):
+            ...
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started_at
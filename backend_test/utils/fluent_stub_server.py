@@ -0,0 +1,96 @@
+import socketserver
+import threading
+
+import msgpack
+
+
+class FluentForwardStubServer:
+    """
+    Local tcp server that mimics a fluentbit forward input, meant to be used
+    by tests instead of shipping logs to fluentbit.
+
+    Every received message is recorded in `received_messages` as a
+    (tag, entries) tuple, forward mode messages carrying a list of
+    [time, record] entries and message mode ones a single entry
+    """
+
+    def __init__(self):
+        self.received_messages = []
+        self.connections_count = 0
+        self._lock = threading.Condition()
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), self._handler_class()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def received_records(self):
+        with self._lock:
+            return [
+                record
+                for _, entries in self.received_messages
+                for _, record in entries
+            ]
+
+    def wait_for_records(self, records_count, timeout=5):
+        """
+        Waits until records_count records were received, records sent by a
+        client are only recorded once the server thread reads them
+        """
+        with self._lock:
+            return self._lock.wait_for(
+                lambda: sum(len(entries) for _, entries in self.received_messages)
+                >= records_count,
+                timeout,
+            )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, message):
+        tag, entries = message[0], message[1]
+
+        if not isinstance(entries, list):
+            entries = [[entries, message[2]]]
+
+        with self._lock:
+            self.received_messages.append((tag, entries))
+            self._lock.notify_all()
+
+    def _handler_class(self):
+        stub_server = self
+
+        class FluentForwardStubHandler(socketserver.BaseRequestHandler):
+
+            def handle(self):
+                with stub_server._lock:
+                    stub_server.connections_count += 1
+
+                unpacker = msgpack.Unpacker(raw=False)
+
+                for chunk in iter(lambda: self.request.recv(65536), b""):
+                    unpacker.feed(chunk)
+                    for message in unpacker:
+                        stub_server._record(message)
+
+        return FluentForwardStubHandler
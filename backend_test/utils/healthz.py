@@ -1,3 +1,4 @@
+from django.http import HttpResponse
 from rest_framework import permissions
 from rest_framework.decorators import (
     api_view,
@@ -12,3 +13,7 @@ from rest_framework.response import Response
 @authentication_classes([])
 def healthz(request, *args, **kwargs):
     return Response(status=200)
+
+
+async def async_healthz(request, *args, **kwargs):
+    return HttpResponse(status=200)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def get_etag(*parts):
+    """
+    Builds a quoted strong etag out of the given parts,
+    i.e get_etag(3, 'json') returns '"3-json"'
+    """
+    return quote_etag("-".join(str(part) for part in parts))
+
+
+def set_conditional_headers(response, etag, last_modified=None, public=False):
+    """
+    Adds the validators of a resource to the response and opts it in
+    to short-lived caching (see HeaderNoCacheMiddleware)
+    """
+    response["ETag"] = etag
+
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+
+    patch_vary_headers(response, ("Accept",))
+    response.cache_control_directives = {
+        "public" if public else "private": True,
+        "max_age": settings.HTTP_CACHE_MAX_AGE,
+        "must_revalidate": True,
+    }
+
+    return response
+
+
+def get_not_modified_response(request, etag, last_modified=None, public=False):
+    """
+    Returns an http304 response when the validators sent on the request
+    (If-None-Match/If-Modified-Since) match the current ones, None otherwise
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+    if response is not None:
+        set_conditional_headers(response, etag, last_modified, public=public)
+
+    return response
+
+
+class Echo:
+    """
+    File-like object that hands back whatever is written to it, lets
+    csv.writer produce rows for streaming responses without buffering them
+    """
+
+    def write(self, value):
+        return value
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SlackWebhookStubServer:
+    """
+    Local http server that mimics slack incoming web hooks, meant to be used
+    by tests and benchmarks instead of hitting slack.
+
+    Every POST is answered with an http200 after `latency` seconds unless a
+    response was scripted for its path, `responses` maps a path to the list
+    of responses returned to the consecutive requests made to it, each
+    response being a status code or a (status code, headers) tuple, i.e
+    {'/services/1': [(429, {'Retry-After': '1'}), 200]}, only the payloads
+    answered successfully are recorded in `received_payloads`
+    """
+
+    def __init__(self, latency=0, responses=None):
+        self.latency = latency
+        self.responses = defaultdict(
+            deque,
+            {path: deque(statuses) for path, statuses in (responses or {}).items()},
+        )
+        self.received_payloads = defaultdict(list)
+        self.requests_count = 0
+        self.connections_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def delivered_count(self):
+        with self._lock:
+            return sum(len(payloads) for payloads in self.received_payloads.values())
+
+    def get_web_hook_url(self, path):
+        return f"{self.url}/services/{path}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _next_response(self, path):
+        with self._lock:
+            self.requests_count += 1
+            scripted_responses = self.responses[path]
+            response = scripted_responses.popleft() if scripted_responses else 200
+
+        if isinstance(response, int):
+            return response, {}
+        return response
+
+    def _record(self, path, payload):
+        with self._lock:
+            self.received_payloads[path].append(payload)
+
+    def _handler_class(self):
+        stub_server = self
+
+        class SlackWebhookStubHandler(BaseHTTPRequestHandler):
+            # keep-alive connections, same as slack
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub_server._lock:
+                    stub_server.connections_count += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status_code, headers = stub_server._next_response(self.path)
+
+                if stub_server.latency:
+                    time.sleep(stub_server.latency)
+
+                if status_code < 300:
+                    stub_server._record(self.path, json.loads(body or b"null"))
+
+                response_body = b"ok" if status_code < 300 else b"error"
+                self.send_response(status_code)
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return SlackWebhookStubHandler
@@ -0,0 +1,182 @@
+"""
+Fixtures of the hot paths benchmark suite, run with `pytest benchmarks`.
+
+The test database is seeded once per session with realistic volumes, every
+benchmark then records the latency and query count of its scenario. Results
+are written as json to --bench-json and, when a --bench-baseline results file
+is given, a scenario fails when its median latency grows past the baseline by
+more than --bench-threshold or when it runs more queries than the baseline
+"""
+import json
+import math
+import os
+import statistics
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from backend_test.utils.db_utils import QueryCounter
+from backend_test.utils.slack_stub_server import SlackWebhookStubServer
+from meal_api.management.commands.seed_meal_data import EMPLOYEE_EMAIL
+from meal_api.models import Employee
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "meal API hot paths benchmarks")
+    group.addoption("--bench-employees", type=int, default=10000)
+    group.addoption("--bench-menus", type=int, default=365)
+    group.addoption("--bench-orders", type=int, default=1000000)
+    group.addoption("--bench-rounds", type=int, default=50)
+    group.addoption(
+        "--bench-json",
+        default=os.path.join("benchmarks", "results.json"),
+        help="path the results are written to",
+    )
+    group.addoption(
+        "--bench-baseline",
+        default=None,
+        help="results file of a previous run to compare against",
+    )
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=0.2,
+        help="allowed median latency growth over the baseline, 0.2 is 20%%",
+    )
+
+
+class BenchmarkRecorder:
+    """
+    Runs the benchmarked scenarios and keeps their results, latencies are
+    reported in milliseconds
+    """
+
+    def __init__(self, rounds, baseline, threshold):
+        self.rounds = rounds
+        self.baseline = baseline
+        self.threshold = threshold
+        self.results = {}
+
+    def __call__(self, name, scenario, setup=None, rounds=None):
+        """
+        Runs the scenario rounds times after a warm up run and returns the
+        regressions found against the baseline, setup runs before every
+        round without being measured
+        """
+        latencies = []
+        queries_counts = []
+
+        for round_number in range(-1, rounds or self.rounds):
+            if setup is not None:
+                setup()
+
+            query_counter = QueryCounter()
+            with connection.execute_wrapper(query_counter):
+                started_at = time.perf_counter()
+                scenario()
+                elapsed = time.perf_counter() - started_at
+
+            # the warm up run fills the caches and connections
+            if round_number >= 0:
+                latencies.append(elapsed * 1000)
+                queries_counts.append(query_counter.count)
+
+        latencies.sort()
+        self.results[name] = {
+            "rounds": len(latencies),
+            "latency_median": statistics.median(latencies),
+            "latency_p95": latencies[math.ceil(len(latencies) * 0.95) - 1],
+            "latency_mean": statistics.mean(latencies),
+            "queries": max(queries_counts),
+        }
+
+        return self.get_regressions(name)
+
+    def get_regressions(self, name):
+        result = self.results[name]
+        baseline_result = self.baseline.get(name)
+        regressions = []
+
+        if baseline_result is None:
+            return regressions
+
+        max_latency = baseline_result["latency_median"] * (1 + self.threshold)
+        if result["latency_median"] > max_latency:
+            regressions.append(
+                f"{name} median latency {result['latency_median']:.2f}ms is over "
+                f"{max_latency:.2f}ms"
+            )
+        if result["queries"] > baseline_result["queries"]:
+            regressions.append(
+                f"{name} runs {result['queries']} queries, "
+                f"{baseline_result['queries']} on the baseline"
+            )
+
+        return regressions
+
+
+@pytest.fixture(scope="session")
+def bench_options(request):
+    return {
+        option: request.config.getoption(f"--bench-{option}")
+        for option in (
+            "employees",
+            "menus",
+            "orders",
+            "rounds",
+            "json",
+            "baseline",
+            "threshold",
+        )
+    }
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker, bench_options):
+    with django_db_blocker.unblock():
+        # a reused test database keeps the data seeded by a previous run
+        if not Employee.objects.filter(email=EMPLOYEE_EMAIL.format(idx=0)).exists():
+            call_command(
+                "seed_meal_data",
+                employees=bench_options["employees"],
+                menus=bench_options["menus"],
+                orders=bench_options["orders"],
+            )
+
+
+@pytest.fixture
+def slack_stub_server():
+    with SlackWebhookStubServer() as stub_server:
+        yield stub_server
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(bench_options):
+    baseline = {}
+
+    if bench_options["baseline"]:
+        with open(bench_options["baseline"]) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    recorder = BenchmarkRecorder(
+        bench_options["rounds"],
+        baseline,
+        bench_options["threshold"],
+    )
+    yield recorder
+
+    with open(bench_options["json"], "w") as results_file:
+        json.dump(
+            {
+                "volumes": {
+                    option: bench_options[option]
+                    for option in ("employees", "menus", "orders")
+                },
+                "results": recorder.results,
+            },
+            results_file,
+            indent=2,
+            sort_keys=True,
+        )
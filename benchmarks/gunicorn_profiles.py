@@ -0,0 +1,116 @@
+"""
+Boots gunicorn with every performance profile of gunicorn_config.py and load
+tests the given meal API endpoints against it (see benchmarks.load_test),
+a profile fails when the server does not boot or any request errors.
+
+Usage:
+    python -m benchmarks.gunicorn_profiles --profile sync gthread gevent asgi \
+        --path /healthz /menu/<uuid> --concurrency 64 --duration 10
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.load_test import run
+
+APPLICATIONS = {"asgi": "backend_test.asgi"}
+DEFAULT_APPLICATION = "backend_test.wsgi"
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, port):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config=gunicorn_config.py",
+            f"--bind=127.0.0.1:{port}",
+            APPLICATIONS.get(profile, DEFAULT_APPLICATION),
+        ],
+        env=dict(os.environ, GUNICORN_PROFILE=profile),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(server, url, timeout=30):
+    deadline = time.perf_counter() + timeout
+
+    while time.perf_counter() < deadline and server.poll() is None:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+
+    return False
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=35)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def benchmark_profile(profile, paths, concurrency, duration, warmup):
+    port = get_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(profile, port)
+
+    try:
+        if not wait_until_ready(server, f"{base_url}/healthz"):
+            print(f"{profile:>8}: server did not boot")
+            return False
+
+        passed = True
+        for path in paths:
+            run(base_url + path, concurrency, warmup)
+            stats = run(base_url + path, concurrency, duration)
+            passed = passed and not stats["errors"]
+            print(
+                f"{profile:>8} {path:<50} {stats['rps']:10.1f} req/s "
+                f"p50 {stats['p50'] * 1000:7.1f}ms "
+                f"p99 {stats['p99'] * 1000:7.1f}ms "
+                f"{stats['errors']:6d} errors"
+            )
+
+        return passed
+    finally:
+        stop_server(server)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--profile", nargs="+", default=["sync", "gthread", "gevent", "asgi"]
+    )
+    parser.add_argument("--path", nargs="+", default=["/healthz"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} clients, {args.duration:.0f}s per endpoint")
+    results = [
+        benchmark_profile(
+            profile, args.path, args.concurrency, args.duration, args.warmup
+        )
+        for profile in args.profile
+    ]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,103 @@
+"""
+Load tests running servers of the project, i.e the sync gunicorn setup
+against the ASGI one, reporting requests per second and latency percentiles
+of every target for the same path and number of concurrent clients.
+
+Usage:
+    gunicorn --config=gunicorn_config.py --bind=127.0.0.1:8000 backend_test.wsgi
+    gunicorn --config=gunicorn_config.py --bind=127.0.0.1:8001 \
+        --worker-class=uvicorn.workers.UvicornWorker backend_test.asgi
+    python -m benchmarks.load_test --path /menu/<uuid> \
+        --target sync=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(sorted_values, percent):
+    index = min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def client(url, deadline):
+    """
+    Requests the url over a keep-alive session until the deadline, returns
+    the latencies of the successful requests and the errors count
+    """
+    latencies = []
+    errors = 0
+
+    with requests.Session() as session:
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                response = session.get(url, timeout=10)
+            except requests.RequestException:
+                errors += 1
+                continue
+
+            if response.ok:
+                latencies.append(time.perf_counter() - started_at)
+            else:
+                errors += 1
+
+    return latencies, errors
+
+
+def run(url, concurrency, duration):
+    deadline = time.perf_counter() + duration
+    barrier = threading.Barrier(concurrency)
+
+    def start_client():
+        barrier.wait()
+        return client(url, deadline)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: start_client(), range(concurrency)))
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50": percentile(latencies, 50) if latencies else 0,
+        "p99": percentile(latencies, 99) if latencies else 0,
+        "mean": statistics.mean(latencies) if latencies else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="name=base_url of a running server, can be repeated",
+    )
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.path}, {args.concurrency} clients, {args.duration:.0f}s per target")
+    for target in args.target:
+        name, base_url = target.split("=", 1)
+        url = base_url.rstrip("/") + args.path
+        run(url, args.concurrency, args.warmup)
+        stats = run(url, args.concurrency, args.duration)
+        print(
+            f"{name:>10}: {stats['rps']:10.1f} req/s "
+            f"p50 {stats['p50'] * 1000:7.1f}ms "
+            f"p99 {stats['p99'] * 1000:7.1f}ms "
+            f"{stats['errors']:6d} errors"
+        )
@@ -0,0 +1,93 @@
+"""
+Microbenchmarks the fluent record formatter, comparing the records per second
+of the json round trip with the single pass sanitize mode on typical log
+payloads.
+
+Usage: python -m benchmarks.log_formatter --records 50000
+"""
+import argparse
+import datetime
+import decimal
+import logging
+import os
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_test.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+
+PAYLOADS = {
+    "plain message": ("Menu notification sent", None),
+    "scalar data": ("Menu notification sent", 42),
+    "dict message": ({"message": "Menu notification sent", "attempts": 3}, None),
+    "nested data": (
+        "Request went over its query budget",
+        {
+            "view": "meal_api:order-list",
+            "queries": 12,
+            "db_time": 0.31,
+            "created_at": datetime.datetime(2020, 7, 10, 11, 30),
+            "menu_uuid": uuid.UUID("7d1f0a6e-7f4b-4b7c-9b86-3c5cdbd3d1c5"),
+            "price": decimal.Decimal("10.50"),
+            "options": [{"option_number": idx, "description": "Corn pie"} for idx in range(5)],
+        },
+    ),
+}
+
+
+def get_formatter(sanitize):
+    formatter_config = dict(settings.LOGGING["formatters"]["fluent_formatter"])
+    formatter_class = import_string(formatter_config.pop("()"))
+    # same as logging.config, which hands the format over as fmt
+    formatter_config["fmt"] = formatter_config.pop("format")
+    formatter_config["sanitize"] = sanitize
+
+    return formatter_class(**formatter_config)
+
+
+def make_record(msg, data):
+    record = logging.LogRecord("meal_api", logging.INFO, __file__, 0, msg, (), None)
+    if data is not None:
+        record.data = data
+
+    return record
+
+
+def records_per_second(formatter, record, records_count):
+    started_at = time.perf_counter()
+    for _ in range(records_count):
+        formatter.format(record)
+
+    return records_count / (time.perf_counter() - started_at)
+
+
+def run(records_count):
+    formatters = {
+        "json round trip": get_formatter(sanitize=False),
+        "sanitize": get_formatter(sanitize=True),
+    }
+
+    print(f"{records_count} records per payload")
+    for payload_name, (msg, data) in PAYLOADS.items():
+        record = make_record(msg, data)
+        results = {
+            name: records_per_second(formatter, record, records_count)
+            for name, formatter in formatters.items()
+        }
+        print(
+            f"{payload_name:>14}: "
+            + " ".join(f"{name} {rps:10.1f} rec/s" for name, rps in results.items())
+            + f" ({results['sanitize'] / results['json round trip']:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.records)
@@ -0,0 +1,69 @@
+"""
+Benchmarks the password hashers, reporting the logins per second a single
+sync worker can verify with each of them at the configured cost (see the
+ARGON2_*, BCRYPT_ROUNDS and PBKDF2_ITERATIONS settings). Password checks are
+CPU bound, so the rate of a single process is the ceiling of a worker.
+
+Usage: ARGON2_MEMORY_COST=1024 python -m benchmarks.password_hashers --duration 3
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_test.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import (  # noqa: E402
+    check_password,
+    identify_hasher,
+    make_password,
+)
+from django.test import override_settings  # noqa: E402
+
+PASSWORD = "meal-data"
+
+
+def logins_per_second(hasher_name, duration):
+    hasher = settings.PASSWORD_HASHERS_BY_NAME[hasher_name]
+
+    with override_settings(PASSWORD_HASHERS=[hasher]):
+        encoded = make_password(PASSWORD)
+        logins_count = 0
+        started_at = time.perf_counter()
+
+        while time.perf_counter() - started_at < duration:
+            check_password(PASSWORD, encoded)
+            logins_count += 1
+
+        cost = ", ".join(
+            f"{name} {value}"
+            for name, value in identify_hasher(encoded).safe_summary(encoded).items()
+            if name not in ("algorithm", "salt", "hash", "checksum")
+        )
+
+    return logins_count / (time.perf_counter() - started_at), cost
+
+
+def run(hashers_names, duration):
+    for hasher_name in hashers_names:
+        rate, cost = logins_per_second(hasher_name, duration)
+        print(
+            f"{hasher_name:>8}: {rate:10.1f} logins/s per worker "
+            f"{1000 / rate:8.2f}ms per login  {cost}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--hasher",
+        nargs="+",
+        default=["pbkdf2", "argon2", "bcrypt", "md5"],
+        choices=list(settings.PASSWORD_HASHERS_BY_NAME),
+    )
+    parser.add_argument("--duration", type=float, default=2)
+    args = parser.parse_args()
+    run(args.hasher, args.duration)
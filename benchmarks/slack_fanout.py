@@ -0,0 +1,67 @@
+"""
+Benchmarks the slack menu notification fan-out against a local stub web hook
+server, comparing the former one request at a time loop with the pooled
+concurrent delivery at several concurrency levels.
+
+Usage: python -m benchmarks.slack_fanout --web-hooks 2000 --latency 0.05
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend_test.settings")
+# measures the raw fan-out, the slack rate limit would cap every scenario
+os.environ.setdefault("SLACK_RATE_LIMIT", "0")
+django.setup()
+
+from backend_test.tasks import send_slack_message, send_slack_messages  # noqa: E402
+from backend_test.utils.slack_stub_server import SlackWebhookStubServer  # noqa: E402
+
+MENU_MESSAGE = "Hello!\nI share with you today's menu :)\n\nOption 1: Corn pie\n"
+
+
+def sequential_delivery(web_hooks_urls):
+    for web_hook_url in web_hooks_urls:
+        send_slack_message(MENU_MESSAGE, web_hook_url)
+
+
+def run(web_hooks_count, latency, concurrency_levels):
+    with SlackWebhookStubServer(latency=latency) as stub_server:
+        web_hooks_urls = [
+            stub_server.get_web_hook_url(idx) for idx in range(web_hooks_count)
+        ]
+        scenarios = [("sequential", lambda: sequential_delivery(web_hooks_urls))]
+        scenarios += [
+            (
+                f"pooled x{concurrency}",
+                lambda concurrency=concurrency: send_slack_messages(
+                    MENU_MESSAGE, web_hooks_urls, concurrency=concurrency
+                ),
+            )
+            for concurrency in concurrency_levels
+        ]
+
+        print(f"{web_hooks_count} web hooks, {latency * 1000:.0f}ms per request")
+        for name, scenario in scenarios:
+            connections_before = stub_server.connections_count
+            started_at = time.perf_counter()
+            scenario()
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"{name:>14}: {elapsed:8.2f}s "
+                f"{web_hooks_count / elapsed:10.1f} msg/s "
+                f"{stub_server.connections_count - connections_before:6d} connections"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--web-hooks", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[8, 16, 32, 64]
+    )
+    args = parser.parse_args()
+    run(args.web_hooks, args.latency, args.concurrency)
@@ -0,0 +1,177 @@
+from datetime import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from django.urls import reverse
+from mockito import unstub, when
+from rest_framework.test import APIClient
+
+from backend_test.tasks import (
+    create_notification_deliveries,
+    send_menu_notification_chunk,
+)
+from backend_test.utils import datetime_utils
+from meal_api.models import Menu, NotificationDelivery
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def super_user():
+    return get_user_model().objects.create_superuser(
+        email="benchmark-admin@benchmark.local",
+    )
+
+
+@pytest.fixture
+def todays_menu():
+    return Menu.objects.order_by("-date").first()
+
+
+@pytest.mark.django_db
+class TestHotPathsBenchmarks:
+    def test_public_menu(self, benchmark_recorder, client, todays_menu):
+        """
+        Benchmarks the public menu served from the cache and rendered again
+        after the cache was cleared
+        """
+        request_url = reverse("public-menu", args=(todays_menu.uuid,))
+
+        regressions = benchmark_recorder(
+            "public_menu", lambda: client.get(request_url)
+        ) + benchmark_recorder(
+            "public_menu_uncached", lambda: client.get(request_url), setup=cache.clear
+        )
+
+        assert not regressions
+
+    def test_order_create(self, benchmark_recorder, client, todays_menu):
+        """
+        Benchmarks employees placing their order in today's menu, every round
+        is a different employee that has not ordered yet
+        """
+        request_url = reverse("meal_api:order-list")
+        employees = iter(
+            get_user_model()
+            .objects.exclude(order__menu=todays_menu)
+            .filter(email__endswith="@seed.local")
+        )
+        payload = {
+            "selected_option": 1,
+            "customizations": "No salad",
+            "menu": todays_menu.uuid,
+        }
+
+        def place_order():
+            response = client.post(request_url, payload)
+            assert response.status_code == 201
+
+        when(datetime_utils).get_time_now(...).thenReturn(time(hour=10))
+        regressions = benchmark_recorder(
+            "order_create",
+            place_order,
+            setup=lambda: client.force_authenticate(user=next(employees)),
+        )
+        unstub()
+
+        assert not regressions
+
+    @pytest.mark.parametrize("session_engine", ["db", "cached_db", "cache"])
+    def test_session_authenticated_orders(
+        self, benchmark_recorder, settings, session_engine
+    ):
+        """
+        Benchmarks the orders list of an employee logged in by session, the
+        query counts show the session lookups saved by each session engine
+        """
+        settings.SESSION_ENGINE = f"django.contrib.sessions.backends.{session_engine}"
+        request_url = reverse("meal_api:order-list")
+        client = APIClient()
+        client.force_login(
+            get_user_model().objects.filter(email__endswith="@seed.local").first()
+        )
+
+        regressions = benchmark_recorder(
+            f"session_authenticated_orders[{session_engine}]",
+            lambda: client.get(request_url),
+        )
+
+        assert not regressions
+
+    def test_menu_orders(self, benchmark_recorder, client, super_user, todays_menu):
+        """
+        Benchmarks the first page of the orders of today's menu
+        """
+        request_url = reverse("meal_api:menu-orders", args=(todays_menu.uuid,))
+        client.force_authenticate(user=super_user)
+
+        regressions = benchmark_recorder("menu_orders", lambda: client.get(request_url))
+
+        assert not regressions
+
+    def test_menu_options_list(
+        self, benchmark_recorder, client, super_user, todays_menu
+    ):
+        """
+        Benchmarks the list of meal options of today's menu
+        """
+        request_url = reverse(
+            "meal_api:menu-option-list", kwargs={"menu_uuid": todays_menu.uuid}
+        )
+        client.force_authenticate(user=super_user)
+
+        regressions = benchmark_recorder(
+            "menu_options_list", lambda: client.get(request_url)
+        )
+
+        assert not regressions
+
+    def test_menu_notification_chunk(
+        self, benchmark_recorder, settings, slack_stub_server, todays_menu
+    ):
+        """
+        Benchmarks sending a chunk of slack notifications of today's menu to
+        the local slack stub server
+        """
+        # measures the delivery, not the slack rate limit
+        settings.SLACK_RATE_LIMIT = 0
+        create_notification_deliveries(todays_menu, "CL")
+        notification_deliveries = NotificationDelivery.objects.filter(
+            pk__in=list(
+                todays_menu.notification_deliveries.values_list("pk", flat=True)[
+                    : settings.SLACK_NOTIFICATION_CHUNK_SIZE
+                ]
+            ),
+        )
+        notification_deliveries_ids = list(
+            notification_deliveries.values_list("pk", flat=True)
+        )
+        # the seeded web hooks point to slack, the benchmarked ones are
+        # pointed to the slack stub server
+        get_user_model().objects.filter(
+            pk__in=notification_deliveries.values("employee"),
+        ).update(
+            slack_web_hook=Concat(
+                Value(f"{slack_stub_server.url}/services/"),
+                Cast("pk", CharField()),
+            ),
+        )
+
+        regressions = benchmark_recorder(
+            "menu_notification_chunk",
+            lambda: send_menu_notification_chunk(
+                todays_menu.pk, notification_deliveries_ids, todays_menu.version
+            ),
+            setup=lambda: notification_deliveries.update(
+                status=NotificationDelivery.PENDING
+            ),
+            rounds=10,
+        )
+
+        assert not regressions
@@ -0,0 +1,18 @@
+import pytest
+
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def md5_password_hasher(settings):
+    """ Hashes passwords with md5, the configured hashers are deliberately
+        slow. Never set PASSWORD_HASHER to md5 outside the tests.
+    """
+    settings.PASSWORD_HASHERS = [settings.PASSWORD_HASHERS_BY_NAME["md5"]]
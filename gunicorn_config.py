@@ -1,5 +1,6 @@
 import atexit
 import gc
+import glob
 import os
 import signal
 import threading
@@ -7,58 +8,261 @@ import time
 
 import psutil
 
+from backend_test.envtools import getenv
+
+# Performance profiles selected with GUNICORN_PROFILE, every setting of the
+# chosen profile can still be overridden by its own env var (GUNICORN_THREADS,
+# GUNICORN_KEEPALIVE...). Requests spend most of their time waiting on
+# postgres and redis, so threaded or evented workers serve many of them per
+# process while the sync one serves a single request at a time
+PROFILES = {
+    # one request at a time per process
+    "sync": {
+        "worker_class": "sync",
+        "threads": 1,
+        "worker_connections": 1000,
+        "keepalive": 2,
+        "timeout": 10,
+        "max_requests": 0,
+        "max_requests_jitter": 0,
+    },
+    # a pool of threads per process, every thread holds its own database
+    # connection so threads * workers must fit in postgres max_connections
+    "gthread": {
+        "worker_class": "gthread",
+        "threads": 8,
+        "worker_connections": 1000,
+        "keepalive": 5,
+        "timeout": 30,
+        "max_requests": 5000,
+        "max_requests_jitter": 500,
+    },
+    # greenlets, psycopg2 is made cooperative in post_fork, every in-flight
+    # request holds its own database connection, bounded by worker_connections
+    "gevent": {
+        "worker_class": "gevent",
+        "threads": 1,
+        "worker_connections": 50,
+        "keepalive": 5,
+        "timeout": 30,
+        "max_requests": 5000,
+        "max_requests_jitter": 500,
+    },
+    # uvicorn workers for backend_test.asgi, see docker-entrypoint.sh asgi
+    "asgi": {
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "threads": 1,
+        "worker_connections": 1000,
+        "keepalive": 5,
+        "timeout": 30,
+        "max_requests": 5000,
+        "max_requests_jitter": 500,
+    },
+}
+
+profile_name = getenv("GUNICORN_PROFILE", default="sync")
+
+if profile_name not in PROFILES:
+    raise ValueError(
+        f"Unknown GUNICORN_PROFILE {profile_name}, "
+        f"valid profiles are: {', '.join(PROFILES)}"
+    )
+
+profile = PROFILES[profile_name]
+
 bind = "0.0.0.0:8000"
 
-workers = int(os.getenv("CONCURRENCY", default=2))
-worker_class = "sync"
+workers = getenv("CONCURRENCY", default="2", coalesce=int)
+worker_class = getenv("GUNICORN_WORKER_CLASS", default=profile["worker_class"])
+threads = getenv("GUNICORN_THREADS", default=str(profile["threads"]), coalesce=int)
+worker_connections = getenv(
+    "GUNICORN_WORKER_CONNECTIONS",
+    default=str(profile["worker_connections"]),
+    coalesce=int,
+)
+keepalive = getenv(
+    "GUNICORN_KEEPALIVE", default=str(profile["keepalive"]), coalesce=int
+)
+# workers are recycled after max_requests +- jitter requests, the jitter
+# keeps them from restarting all at once
+max_requests = getenv(
+    "GUNICORN_MAX_REQUESTS", default=str(profile["max_requests"]), coalesce=int
+)
+max_requests_jitter = getenv(
+    "GUNICORN_MAX_REQUESTS_JITTER",
+    default=str(profile["max_requests_jitter"]),
+    coalesce=int,
+)
 
 preload_app = True
 
-timeout = 10
+timeout = getenv("GUNICORN_TIMEOUT", default=str(profile["timeout"]), coalesce=int)
 graceful_timeout = 30
 
-restart_on_rss = int(os.getenv("RESTART_ON_RSS", default=500))
+# workers whose memory goes over restart_on_memory MB are recycled, one at a
+# time. Memory is measured as uss (default) or pss, after gc.freeze() and fork
+# rss also counts the copy-on-write pages shared with the master.
+# Per worker memory is written in prometheus text format to
+# MEMORY_WATCH_METRICS_PATH (i.e for the node exporter textfile collector)
+restart_on_memory = getenv(
+    "RESTART_ON_MEMORY", default=os.getenv("RESTART_ON_RSS", "500"), coalesce=int
+)
+memory_watch_metric = getenv("MEMORY_WATCH_METRIC", default="uss")
+memory_watch_interval = getenv(
+    "MEMORY_WATCH_INTERVAL", default="10", coalesce=float
+)
+memory_watch_metrics_path = getenv("MEMORY_WATCH_METRICS_PATH", default="")
+
+MEMORY_METRICS = ("rss", "uss", "pss")
+
+if memory_watch_metric not in MEMORY_METRICS:
+    raise ValueError(
+        f"Unknown MEMORY_WATCH_METRIC {memory_watch_metric}, "
+        f"valid metrics are: {', '.join(MEMORY_METRICS)}"
+    )
 
 
 class MemoryWatch(threading.Thread):
-    def __init__(self, server, restart_on_rss):
+    """
+    Samples the memory of the workers every interval seconds and recycles
+    the one using the most once it goes over restart_on_memory MB, the next
+    offender is only recycled after the previous one has been replaced so
+    capacity never drops by more than a worker
+    """
+
+    def __init__(
+        self, server, restart_on_memory, metric, interval, metrics_path=None
+    ):
         super().__init__()
         self.daemon = True
         self.server = server
-        self.restart_on_rss = restart_on_rss
+        self.restart_on_memory = restart_on_memory
+        self.metric = metric
+        self.interval = interval
+        self.metrics_path = metrics_path
+        self.recycling_pid = None
+        self.restarts_count = 0
 
     def memory_usage(self, pid):
-        return int(psutil.Process(pid).memory_info()[0] / 1024.0 / 1024.0)
+        """ Returns the rss, uss and pss of the process in bytes """
+        memory_info = psutil.Process(pid).memory_full_info()
+        return {metric: getattr(memory_info, metric, 0) for metric in MEMORY_METRICS}
+
+    def workers_memory_usage(self):
+        workers_memory_usage = {}
+
+        for pid in list(self.server.WORKERS):
+            try:
+                workers_memory_usage[pid] = self.memory_usage(pid)
+            except psutil.NoSuchProcess:
+                continue
+
+        return workers_memory_usage
+
+    def recycle(self, workers_memory_usage):
+        if self.recycling_pid is not None and (
+            self.recycling_pid in workers_memory_usage
+            or len(workers_memory_usage) < self.server.num_workers
+        ):
+            # still shutting down or its replacement not spawned yet
+            return
+
+        self.recycling_pid = None
+        offenders = [
+            (memory_usage[self.metric], pid)
+            for pid, memory_usage in workers_memory_usage.items()
+            if memory_usage[self.metric] / 1024.0 / 1024.0 >= self.restart_on_memory
+        ]
+
+        if not offenders:
+            return
+
+        pid_memory_usage, pid = max(offenders)
+        self.server.log.info(
+            "restart_on_memory on PID %s, observed %s memory usage: %sMB",
+            pid,
+            self.metric,
+            int(pid_memory_usage / 1024.0 / 1024.0),
+        )
+        self.server.kill_worker(pid, signal.SIGTERM)
+        self.recycling_pid = pid
+        self.restarts_count += 1
+
+    def write_metrics(self, workers_memory_usage):
+        lines = [
+            "# HELP gunicorn_worker_memory_bytes Memory used by the gunicorn workers",
+            "# TYPE gunicorn_worker_memory_bytes gauge",
+        ]
+        lines += [
+            f'gunicorn_worker_memory_bytes{{pid="{pid}",type="{metric}"}} {value}'
+            for pid, memory_usage in sorted(workers_memory_usage.items())
+            for metric, value in memory_usage.items()
+        ]
+        lines += [
+            "# HELP gunicorn_worker_memory_restarts_total Workers recycled for "
+            "going over restart_on_memory",
+            "# TYPE gunicorn_worker_memory_restarts_total counter",
+            f"gunicorn_worker_memory_restarts_total {self.restarts_count}",
+        ]
+        # written aside and moved so readers never see a partial file
+        temporary_path = f"{self.metrics_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self.metrics_path)
 
     def run(self):
         while True:
-            time.sleep(60)
-            for (pid, worker) in list(self.server.WORKERS.items()):
-                pid_memory_usage = self.memory_usage(pid)
-                # self.server.log.info("PID %s memory usage: %sMB", pid, pid_memory_usage)
-                if pid_memory_usage >= self.restart_on_rss:
-                    self.server.log.info(
-                        "restart_on_rss on PID %s, observed memory usage: %sMB",
-                        pid,
-                        pid_memory_usage,
-                    )
-                    self.server.kill_worker(pid, signal.SIGTERM)
+            time.sleep(self.interval)
+            workers_memory_usage = self.workers_memory_usage()
+            self.recycle(workers_memory_usage)
+            if self.metrics_path:
+                self.write_metrics(workers_memory_usage)
 
 
 # disable Python GC in master as early as possible
 gc.disable()
 
+# directory shared by the workers to write their prometheus metrics, see
+# backend_test.metrics
+prometheus_multiproc_dir = os.environ.get("prometheus_multiproc_dir")
+
+
+def on_starting(server):
+    # drop the metrics files of a previous run
+    if prometheus_multiproc_dir:
+        for metrics_file in glob.glob(os.path.join(prometheus_multiproc_dir, "*.db")):
+            os.remove(metrics_file)
+
 
 def when_ready(server):
     # mark preloaded app objects as uncollectable
     gc.freeze()
     # enable child memory watcher
-    mw = MemoryWatch(server, restart_on_rss)
+    mw = MemoryWatch(
+        server,
+        restart_on_memory,
+        memory_watch_metric,
+        memory_watch_interval,
+        memory_watch_metrics_path,
+    )
     mw.start()
 
 
 def post_fork(server, worker):
     # reenable GC on worker
     gc.enable()
+    if worker_class == "gevent":
+        # let psycopg2 yield to other greenlets while waiting on postgres
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
     # no final GC needed
     atexit.register(os._exit, 0)
+
+
+def child_exit(server, worker):
+    # merge the gauges of dead workers out of the metrics
+    if prometheus_multiproc_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
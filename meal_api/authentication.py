@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    get_authorization_header,
+)
+
+from backend_test.metrics import observe_cache_lookup
+
+
+API_TOKEN_SALT = 'meal_api.api-token'
+API_TOKEN_PRINCIPAL_CACHE_KEY = 'api-token-principal:{employee_id}'
+# employee fields kept in the cached principal, the password hash is not
+API_TOKEN_PRINCIPAL_FIELDS = (
+    'id',
+    'email',
+    'name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+def create_api_token(employee):
+    """
+    Signs a token that authenticates the employee until it expires, the
+    token carries the session auth hash of the employee so changing the
+    password revokes it
+    """
+    return signing.dumps(
+        {'id': employee.pk, 'hash': employee.get_session_auth_hash()},
+        salt=API_TOKEN_SALT,
+    )
+
+
+def get_api_token_principal_cache_key(employee_id):
+    return API_TOKEN_PRINCIPAL_CACHE_KEY.format(employee_id=employee_id)
+
+
+def get_api_token_principal(employee):
+    """
+    Builds the principal of the employee kept in the cache: the fields of
+    API_TOKEN_PRINCIPAL_FIELDS and the session auth hash tokens are checked
+    against, which is derived from the password hash but does not reveal it
+    """
+    return {
+        'fields': {
+            field_name: getattr(employee, field_name)
+            for field_name in API_TOKEN_PRINCIPAL_FIELDS
+        },
+        'hash': employee.get_session_auth_hash(),
+    }
+
+
+def load_api_token_principal(principal):
+    """
+    Builds the employee of a cached principal without querying it, the
+    fields left out of the principal are deferred, they are loaded when
+    accessed and left out when the employee is saved
+    """
+    employee_model = get_user_model()
+    fields = principal['fields']
+
+    return employee_model.from_db(
+        'default',
+        list(fields),
+        [
+            fields[field.attname]
+            for field in employee_model._meta.concrete_fields
+            if field.attname in fields
+        ],
+    )
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Stateless authentication of API clients by a signed token sent as
+    `Authorization: Token <token>`, tokens are verified without touching the
+    session nor the csrf token. The principal of the verified employee is
+    kept in the cache for API_TOKEN_CACHE_TIMEOUT seconds, so authenticated
+    requests run no query to load it, a deactivated employee or a changed
+    password thus takes up to that long to revoke the tokens already
+    verified
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        authorization = get_authorization_header(request).split()
+
+        if not authorization or authorization[0].lower() != self.keyword.lower().encode():
+            return None
+        elif len(authorization) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        try:
+            token = authorization[1].decode()
+            payload = signing.loads(
+                token,
+                salt=API_TOKEN_SALT,
+                max_age=settings.API_TOKEN_MAX_AGE,
+            )
+        except (UnicodeError, signing.BadSignature):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        employee = self.get_principal(payload)
+
+        return employee, token
+
+    def get_principal(self, payload):
+        cache_key = get_api_token_principal_cache_key(payload['id'])
+        principal = observe_cache_lookup(
+            'api-token-principal',
+            cache.get(cache_key),
+        )
+
+        if principal is not None and self.is_valid_principal(principal, payload):
+            return load_api_token_principal(principal)
+
+        # the cached principal may predate a password change the token was
+        # signed after, it is loaded again before rejecting the token
+        employee = get_user_model().objects.filter(pk=payload['id']).first()
+
+        if employee is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        principal = get_api_token_principal(employee)
+
+        if not self.is_valid_principal(principal, payload):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        cache.set(
+            cache_key,
+            principal,
+            timeout=settings.API_TOKEN_CACHE_TIMEOUT,
+        )
+
+        return employee
+
+    def is_valid_principal(self, principal, payload):
+        return principal['fields']['is_active'] and constant_time_compare(
+            principal['hash'],
+            payload['hash'],
+        )
+
+    def authenticate_header(self, request):
+        return self.keyword
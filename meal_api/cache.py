@@ -0,0 +1,135 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from backend_test.metrics import observe_cache_lookup
+from backend_test.utils.async_redis import get_async_redis_connection
+from .serializers import MenuOptionSerializer
+
+
+PUBLIC_MENU_CACHE_KEY = 'public-menu:{menu_uuid}:{generation}'
+PUBLIC_MENU_GENERATION_CACHE_KEY = 'public-menu-generation:{menu_uuid}'
+
+
+def get_public_menu_cache_key(menu_uuid, generation):
+    """
+    Builds the cache key of a public menu in the given generation, the uuid
+    is normalized so the same key is produced no matter the format it was
+    received in
+    """
+    return PUBLIC_MENU_CACHE_KEY.format(
+        menu_uuid=uuid.UUID(str(menu_uuid)),
+        generation=generation,
+    )
+
+
+def get_public_menu_generation_cache_key(menu_uuid):
+    return PUBLIC_MENU_GENERATION_CACHE_KEY.format(
+        menu_uuid=uuid.UUID(str(menu_uuid)),
+    )
+
+
+def get_public_menu_generation(menu_uuid):
+    """
+    Returns the generation the public menu is currently cached in, every
+    invalidation moves the menu to a new generation so entries rendered
+    before it are never read again. The generation must be read before the
+    menu is loaded from the database, a miss is then cached in it.
+
+    A missing generation starts from the current time rather than from
+    zero, so entries left from before it was evicted are never read again
+    """
+    generation_cache_key = get_public_menu_generation_cache_key(menu_uuid)
+    generation = cache.get(generation_cache_key)
+
+    if generation is None:
+        cache.add(generation_cache_key, time.time_ns(), timeout=None)
+        generation = cache.get(generation_cache_key)
+
+    return generation
+
+
+def build_public_menu_data(menu):
+    return {
+        'Requested menu': str(menu),
+        'Menu meal options': [
+            MenuOptionSerializer(meal_option).data
+            for meal_option in menu.meal_options.order_by('option_number')
+        ],
+    }
+
+
+def get_cached_public_menu(menu_uuid, generation):
+    return observe_cache_lookup(
+        'public-menu',
+        cache.get(get_public_menu_cache_key(menu_uuid, generation)),
+    )
+
+
+async def get_cached_public_menu_async(menu_uuid):
+    """
+    Reads the cached public menu of the current generation with the asyncio
+    redis client, the entries are looked up and decoded exactly as the
+    django cache does. A missing generation is a miss, it's only created by
+    the menu loaded from the database
+    """
+    redis = get_async_redis_connection()
+    generation = await redis.get(
+        cache.make_key(get_public_menu_generation_cache_key(menu_uuid)),
+    )
+    cached_value = None
+
+    if generation is not None:
+        cached_value = await redis.get(
+            cache.make_key(get_public_menu_cache_key(
+                menu_uuid,
+                cache.client.decode(generation),
+            )),
+        )
+
+    if cached_value is not None:
+        cached_value = cache.client.decode(cached_value)
+
+    return observe_cache_lookup('public-menu', cached_value)
+
+
+def cache_public_menu(menu, generation=None):
+    """
+    Renders the public menu payload and stores it in the cache along with
+    the menu version it was rendered from, returns the cached entry.
+
+    A menu loaded after a cache miss is stored in the generation read
+    before loading it, so if the menu was invalidated in between the stale
+    entry lands in a generation that is no longer read
+    """
+    if generation is None:
+        generation = get_public_menu_generation(menu.uuid)
+
+    cached_menu = {
+        'version': menu.version,
+        'updated_at': menu.updated_at,
+        'data': build_public_menu_data(menu),
+    }
+    cache.set(
+        get_public_menu_cache_key(menu.uuid, generation),
+        cached_menu,
+        timeout=settings.PUBLIC_MENU_CACHE_TIMEOUT,
+    )
+
+    return cached_menu
+
+
+def invalidate_public_menu(menu_uuid):
+    """
+    Moves the public menu to a new generation, the entries cached so far,
+    and the ones being rendered from the menu before it changed, are no
+    longer read
+    """
+    try:
+        cache.incr(get_public_menu_generation_cache_key(menu_uuid))
+    except ValueError:
+        # without a generation there's no entry of the menu to drop, and
+        # the next one is started after the menu changed
+        pass
@@ -0,0 +1,233 @@
+import random
+import time
+import uuid
+from datetime import (
+    date,
+    datetime,
+    time as datetime_time,
+    timedelta,
+)
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from backend_test.utils.db_utils import copy_rows
+from meal_api.models import (
+    Employee,
+    Menu,
+    MenuOption,
+    Nationality,
+    Order,
+)
+
+EMPLOYEE_EMAIL = 'employee{idx}@seed.local'
+NATIONALITIES = (
+    ('CL', 'Chile', 8),
+    ('AR', 'Argentina', 1),
+    ('PE', 'Peru', 1),
+)
+CUSTOMIZATIONS = ('', '', '', '', 'No salad', 'No tomato', 'Extra dressing')
+# menus are dated from a fixed day rather than from today, so the same seed
+# generates the same data no matter when it's run
+MENUS_START_DATE = date(2021, 1, 1)
+# orders are last updated on their menu day at this time
+ORDERS_UPDATED_AT_TIME = datetime_time(hour=10)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds employees, menus with their meal options and orders for load "
+        "tests and benchmarks, the same seed always generates the same data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=10000)
+        parser.add_argument('--menus', type=int, default=365)
+        parser.add_argument('--options-per-menu', type=int, default=4)
+        parser.add_argument('--orders', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--start-date',
+            type=date.fromisoformat,
+            default=MENUS_START_DATE,
+            help="Date of the first menu (YYYY-MM-DD), one menu per day after",
+        )
+        parser.add_argument(
+            '--password',
+            default='meal-data',
+            help="Password of every seeded employee, hashed only once",
+        )
+        parser.add_argument(
+            '--web-hook-url',
+            default='https://hooks.slack.com',
+            help="The slack web hook of the n-th employee is {url}/services/n",
+        )
+
+    def handle(self, *args, **options):
+        if Employee.objects.filter(email=EMPLOYEE_EMAIL.format(idx=0)).exists():
+            raise CommandError("The database was already seeded")
+
+        started_at = time.perf_counter()
+        randomizer = random.Random(options['seed'])
+
+        with transaction.atomic():
+            employees_ids = self.seed_employees(
+                randomizer,
+                options['employees'],
+                options['password'],
+                options['web_hook_url'],
+            )
+            menus = self.seed_menus(
+                randomizer,
+                options['menus'],
+                options['options_per_menu'],
+                options['start_date'],
+            )
+            orders_count = self.seed_orders(
+                randomizer,
+                employees_ids,
+                menus,
+                options['options_per_menu'],
+                options['orders'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(employees_ids)} employees, {len(menus)} menus and "
+            f"{orders_count} orders in {time.perf_counter() - started_at:.1f}s"
+        ))
+
+    def seed_employees(self, randomizer, employees_count, password, web_hook_url):
+        """
+        Copies the employees, all of them sharing the same password hash,
+        and returns their ids in creation order
+        """
+        Nationality.objects.bulk_create(
+            [
+                Nationality(iso2_code=iso2_code, country_name=country_name)
+                for iso2_code, country_name, _ in NATIONALITIES
+            ],
+            ignore_conflicts=True,
+        )
+        iso2_codes = [iso2_code for iso2_code, _, _ in NATIONALITIES]
+        weights = [weight for _, _, weight in NATIONALITIES]
+        # the salt is drawn from the seed too, so the hash is reproducible
+        password_hash = make_password(
+            password,
+            salt=f'{randomizer.getrandbits(64):016x}',
+        )
+
+        copy_rows(
+            Employee,
+            (
+                'email', 'name', 'password', 'is_active', 'is_staff',
+                'is_superuser', 'slack_web_hook', 'nationality',
+            ),
+            (
+                (
+                    EMPLOYEE_EMAIL.format(idx=idx),
+                    f'Employee {idx}',
+                    password_hash,
+                    True,
+                    False,
+                    False,
+                    f'{web_hook_url}/services/{idx}',
+                    randomizer.choices(iso2_codes, weights)[0],
+                )
+                for idx in range(employees_count)
+            ),
+        )
+
+        return list(
+            Employee.objects
+            .filter(email__endswith='@seed.local')
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def seed_menus(
+        self,
+        randomizer,
+        menus_count,
+        options_per_menu,
+        start_date,
+    ):
+        """
+        Creates published menus of consecutive days starting on start_date
+        with their meal options, returns the menus
+        """
+        menus_dates = (
+            start_date + timedelta(days=days_after)
+            for days_after in range(menus_count)
+        )
+        menus = Menu.objects.bulk_create(
+            Menu(
+                date=menu_date,
+                uuid=uuid.UUID(int=randomizer.getrandbits(128), version=4),
+                is_published=True,
+                updated_at=timezone.make_aware(
+                    datetime.combine(menu_date, datetime_time()),
+                ),
+            )
+            for menu_date in menus_dates
+        )
+        MenuOption.objects.bulk_create(
+            MenuOption(
+                menu=menu,
+                option_number=option_number,
+                description=f'Option {option_number} of {menu}',
+            )
+            for menu in menus
+            for option_number in range(1, options_per_menu + 1)
+        )
+
+        return menus
+
+    def seed_orders(
+        self,
+        randomizer,
+        employees_ids,
+        menus,
+        options_per_menu,
+        orders_count,
+    ):
+        """
+        Copies up to orders_count orders spread evenly over the menus, an
+        employee orders at most once per menu. Returns the orders created
+        """
+        if not employees_ids or not menus:
+            return 0
+
+        orders_per_menu = min(
+            len(employees_ids),
+            -(-orders_count // len(menus)),
+        )
+        orders_count = min(orders_count, orders_per_menu * len(menus))
+
+        copy_rows(
+            Order,
+            ('employee', 'menu', 'selected_option', 'customizations', 'updated_at'),
+            islice(
+                (
+                    (
+                        employee_id,
+                        menu.uuid,
+                        randomizer.randint(1, options_per_menu),
+                        randomizer.choice(CUSTOMIZATIONS),
+                        timezone.make_aware(
+                            datetime.combine(menu.date, ORDERS_UPDATED_AT_TIME),
+                        ),
+                    )
+                    for menu in menus
+                    for employee_id in randomizer.sample(
+                        employees_ids,
+                        orders_per_menu,
+                    )
+                ),
+                orders_count,
+            ),
+        )
+
+        return orders_count
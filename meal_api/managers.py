@@ -1,4 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import BaseUserManager
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.utils import timezone
 
 
 class EmployeeManager(BaseUserManager):
@@ -22,3 +28,157 @@ class EmployeeManager(BaseUserManager):
         superuser.save()
 
         return superuser
+
+
+class MenuQuerySet(QuerySet):
+
+    def touch(self):
+        """
+        Bumps the version of the menus, this must be called whenever a menu
+        or one of its meal options changes so their etags are renewed
+        """
+        return self.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+class OrderQuerySet(QuerySet):
+
+    def place(self, employee, menu_uuid, selected_option, customizations):
+        """
+        Places an order in a single statement that looks the menu up by uuid
+        and inserts the order unless the employee already ordered in it,
+        relying on the (employee, menu) unique constraint.
+        Returns an (order, menu) tuple, menu is None when it does not exist
+        and order is None when the employee had already ordered
+        """
+        order_model = self.model
+        menu_model = order_model._meta.get_field('menu').related_model
+        menu_fields = menu_model._meta.concrete_fields
+        menu_columns = ', '.join(
+            f'menu.{field.column}' for field in menu_fields
+        )
+        order_columns = ', '.join(
+            order_model._meta.get_field(field_name).column
+            for field_name in (
+                'employee',
+                'menu',
+                'selected_option',
+                'customizations',
+                'updated_at',
+            )
+        )
+        conflict_columns = ', '.join(
+            order_model._meta.get_field(field_name).column
+            for field_name in ('employee', 'menu')
+        )
+        menu_uuid_column = menu_model._meta.get_field('uuid').column
+        updated_at_column = order_model._meta.get_field('updated_at').column
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH menu AS (
+                    SELECT * FROM {menu_model._meta.db_table}
+                    WHERE {menu_uuid_column} = %s
+                ), new_order AS (
+                    INSERT INTO {order_model._meta.db_table} ({order_columns})
+                    SELECT %s, menu.{menu_uuid_column}, %s, %s, %s FROM menu
+                    ON CONFLICT ({conflict_columns}) DO NOTHING
+                    RETURNING {order_model._meta.pk.column} AS id,
+                        {updated_at_column} AS updated_at
+                )
+                SELECT new_order.id, new_order.updated_at, {menu_columns}
+                FROM menu LEFT JOIN new_order ON TRUE
+                """,
+                [
+                    menu_uuid,
+                    employee.pk,
+                    selected_option,
+                    customizations,
+                    timezone.now(),
+                ],
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            return None, None
+
+        order_id, order_updated_at, *menu_values = row
+        menu = menu_model.from_db(
+            self.db,
+            [field.attname for field in menu_fields],
+            menu_values,
+        )
+
+        if order_id is None:
+            return None, menu
+
+        order = order_model(
+            id=order_id,
+            employee=employee,
+            menu=menu,
+            selected_option=selected_option,
+            customizations=customizations,
+            updated_at=order_updated_at,
+        )
+        order._state.adding = False
+        order._state.db = self.db
+
+        return order, menu
+
+
+class NotificationDeliveryQuerySet(QuerySet):
+
+    def undelivered(self):
+        return self.exclude(status=self.model.DELIVERED)
+
+    def claimable(self):
+        """
+        Filters the deliveries that may be sent: the pending and failed
+        ones, and the ones claimed over SLACK_DELIVERY_CLAIM_TIMEOUT seconds
+        ago since the task sending them is no longer running
+        """
+        return self.filter(
+            Q(status__in=(self.model.PENDING, self.model.FAILED))
+            | Q(
+                status=self.model.SENDING,
+                claimed_at__lt=timezone.now() - timedelta(
+                    seconds=settings.SLACK_DELIVERY_CLAIM_TIMEOUT,
+                ),
+            ),
+        )
+
+    def claim(self):
+        """
+        Marks the claimable deliveries as being sent and returns them, the
+        rows are locked while claimed and the ones locked by a concurrent
+        claim are skipped, so every delivery is sent by a single task
+        """
+        with transaction.atomic(using=self.db):
+            notification_deliveries = list(
+                self.claimable().select_for_update(skip_locked=True, of=('self',)),
+            )
+            claimed_at = timezone.now()
+            self.model._base_manager.using(self.db).filter(
+                pk__in=[
+                    notification_delivery.pk
+                    for notification_delivery in notification_deliveries
+                ],
+            ).update(status=self.model.SENDING, claimed_at=claimed_at)
+
+        for notification_delivery in notification_deliveries:
+            notification_delivery.status = self.model.SENDING
+            notification_delivery.claimed_at = claimed_at
+
+        return notification_deliveries
+
+    def get_progress(self):
+        """
+        Counts the deliveries by status in a single query
+        """
+        return self.aggregate(
+            total=Count('pk'),
+            delivered=Count('pk', filter=Q(status=self.model.DELIVERED)),
+            failed=Count('pk', filter=Q(status=self.model.FAILED)),
+            pending=Count('pk', filter=Q(status=self.model.PENDING)),
+            sending=Count('pk', filter=Q(status=self.model.SENDING)),
+        )
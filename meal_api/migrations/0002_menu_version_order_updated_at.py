@@ -0,0 +1,29 @@
+# Generated by Django 3.0.8 on 2026-10-18 08:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menu',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Revision counter bumped on every change of the menu or its meal options, used to build the etags of menu responses'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.0.8 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+def delete_duplicates(apps, schema_editor):
+    """
+    Deletes the duplicated meal options and orders the new unique
+    constraints would reject, the last one created of each is kept
+    """
+    MenuOption = apps.get_model('meal_api', 'MenuOption')
+    Order = apps.get_model('meal_api', 'Order')
+
+    MenuOption.objects.filter(
+        models.Exists(MenuOption.objects.filter(
+            menu=models.OuterRef('menu'),
+            option_number=models.OuterRef('option_number'),
+            pk__gt=models.OuterRef('pk'),
+        )),
+    ).delete()
+    Order.objects.filter(
+        models.Exists(Order.objects.filter(
+            employee=models.OuterRef('employee'),
+            menu=models.OuterRef('menu'),
+            pk__gt=models.OuterRef('pk'),
+        )),
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal_api', '0002_menu_version_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['date'], name='menu_date_idx'),
+        ),
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='menuoption',
+            constraint=models.UniqueConstraint(fields=('menu', 'option_number'), name='unique_menu_option_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('employee', 'menu'), name='unique_employee_menu_order'),
+        ),
+    ]
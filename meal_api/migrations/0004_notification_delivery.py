@@ -0,0 +1,35 @@
+# Generated by Django 3.0.8 on 2026-10-18 08:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal_api', '0003_menu_indexes_and_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('delivered_at', models.DateTimeField(null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='meal_api.Menu')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notificationdelivery',
+            index=models.Index(condition=models.Q(_negated=True, status='delivered'), fields=['menu'], name='undelivered_notification_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationdelivery',
+            constraint=models.UniqueConstraint(fields=('menu', 'employee'), name='unique_menu_employee_notification'),
+        ),
+    ]
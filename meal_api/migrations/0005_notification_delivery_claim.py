@@ -0,0 +1,23 @@
+# Generated by Django 3.0.8 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meal_api', '0004_notification_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationdelivery',
+            name='claimed_at',
+            field=models.DateTimeField(help_text='When a task last claimed the delivery to send it', null=True),
+        ),
+        migrations.AlterField(
+            model_name='notificationdelivery',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
@@ -7,8 +7,14 @@ from django.contrib.auth.models import (
 from django.db import models
 from django.db.models.base import Model
 from django.db.models.deletion import DO_NOTHING
+from django.utils import timezone
 
-from .managers import EmployeeManager
+from .managers import (
+    EmployeeManager,
+    MenuQuerySet,
+    NotificationDeliveryQuerySet,
+    OrderQuerySet,
+)
 
 
 class Nationality(Model):
@@ -50,6 +56,25 @@ class Menu(Model):
     date = models.DateField()
     uuid = models.UUIDField(unique=True, default=uuid.uuid4)
     is_published = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text=(
+            "Revision counter bumped on every change of the menu or its "
+            "meal options, used to build the etags of menu responses"
+        ),
+    )
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = MenuQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('date',), name='menu_date_idx'),
+        ]
+
+    def touch(self):
+        Menu.objects.filter(pk=self.pk).touch()
+        self.refresh_from_db(fields=('version', 'updated_at'))
 
     @property
     def meal_options(self):
@@ -59,6 +84,10 @@ class Menu(Model):
     def orders(self):
         return self.order_set.all()
 
+    @property
+    def notification_deliveries(self):
+        return self.notificationdelivery_set.all()
+
     def __str__(self):
         return f"Menu of day: {self.date.isoformat()}"
 
@@ -68,6 +97,14 @@ class MenuOption(Model):
     menu = models.ForeignKey(Menu, on_delete=DO_NOTHING)
     option_number = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('menu', 'option_number'),
+                name='unique_menu_option_number',
+            ),
+        ]
+
     def __str__(self):
         return self.description
 
@@ -77,3 +114,63 @@ class Order(Model):
     selected_option = models.IntegerField()
     customizations = models.CharField(max_length=200)
     menu = models.ForeignKey(Menu, to_field='uuid', on_delete=DO_NOTHING)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('employee', 'menu'),
+                name='unique_employee_menu_order',
+            ),
+        ]
+
+
+class NotificationDelivery(Model):
+    """
+    Outbox of the slack menu notifications, holds one row per menu and
+    employee with the status of the message sent to the employee
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (DELIVERED, 'Delivered'),
+        (FAILED, 'Failed'),
+    )
+
+    menu = models.ForeignKey(Menu, on_delete=DO_NOTHING)
+    employee = models.ForeignKey(Employee, on_delete=DO_NOTHING)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    delivered_at = models.DateTimeField(null=True)
+    claimed_at = models.DateTimeField(
+        null=True,
+        help_text="When a task last claimed the delivery to send it",
+    )
+
+    objects = NotificationDeliveryQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('menu', 'employee'),
+                name='unique_menu_employee_notification',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('menu',),
+                name='undelivered_notification_idx',
+                condition=~models.Q(status='delivered'),
+            ),
+        ]
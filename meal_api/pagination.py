@@ -0,0 +1,13 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the order primary key, pages cost the same
+    no matter how deep into the orders they are
+    """
+    ordering = 'id'
+    page_size = settings.ORDERS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.ORDERS_MAX_PAGE_SIZE
@@ -14,6 +14,8 @@ class MenuSerializer(serializers.ModelSerializer):
         fields = '__all__'
         extra_kwargs = {
             'uuid': {'read_only': True},
+            'version': {'read_only': True},
+            'updated_at': {'read_only': True},
         }
 
 
@@ -32,3 +34,18 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         exclude = ('employee',)
+
+
+class OrderPlacementSerializer(serializers.Serializer):
+    """
+    Validates the payload of a new order without querying the database,
+    the menu is validated when the order is placed
+    """
+    menu = serializers.UUIDField()
+    selected_option = serializers.IntegerField()
+    customizations = serializers.CharField(max_length=200, allow_blank=True)
+
+
+class ApiTokenSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False)
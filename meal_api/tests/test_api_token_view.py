@@ -0,0 +1,211 @@
+import pytest
+
+from datetime import time
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from mockito import (
+    when,
+    unstub,
+)
+
+from backend_test.utils import datetime_utils
+from meal_api.authentication import (
+    get_api_token_principal_cache_key,
+    load_api_token_principal,
+)
+
+
+@pytest.fixture
+def api_token(client, normal_user):
+    normal_user.set_password('TEST_PASSWORD')
+    normal_user.save()
+
+    return client.post(
+        reverse('meal_api:api-token'),
+        {'email': normal_user.email, 'password': 'TEST_PASSWORD'},
+    ).json()['token']
+
+
+@pytest.mark.django_db
+class TestApiTokenView:
+
+    def test_api_token_request(self, client, normal_user):
+        """
+        Tests that an employee gets an api token in exchange for valid
+        credentials and an http400 response otherwise
+        """
+        request_url = reverse('meal_api:api-token')
+        normal_user.set_password('TEST_PASSWORD')
+        normal_user.save()
+
+        token_response = client.post(
+            request_url,
+            {'email': normal_user.email, 'password': 'TEST_PASSWORD'},
+        )
+        wrong_password_response = client.post(
+            request_url,
+            {'email': normal_user.email, 'password': 'WRONG_PASSWORD'},
+        )
+
+        assert token_response.status_code == status.HTTP_200_OK
+        assert token_response.json()['token']
+        assert wrong_password_response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_token_authenticated_requests(
+        self,
+        client,
+        django_assert_num_queries,
+        menu,
+        api_token,
+    ):
+        """
+        Tests that requests authenticated by token make no session query,
+        the employee is only loaded on the first request and then taken
+        from the cache, and that invalid tokens get an http403 response
+        """
+        request_url = reverse('meal_api:order-list', args=())
+        payload = {
+            'selected_option': 1,
+            'customizations': 'TEST',
+            'menu': menu.uuid,
+        }
+        client.credentials(HTTP_AUTHORIZATION=f'Token {api_token}')
+
+        # employee lookup and orders
+        with django_assert_num_queries(1 + 1):
+            first_response = client.get(request_url)
+        # orders
+        with django_assert_num_queries(1):
+            second_response = client.get(request_url)
+
+        when(datetime_utils).get_time_now(...).thenReturn(time(hour=10))
+        # order placement
+        with django_assert_num_queries(1):
+            order_response = client.post(request_url, payload)
+        unstub()
+
+        client.credentials(HTTP_AUTHORIZATION=f'Token {api_token}tampered')
+        invalid_token_response = client.get(request_url)
+
+        assert first_response.status_code == status.HTTP_200_OK
+        assert second_response.status_code == status.HTTP_200_OK
+        assert order_response.status_code == status.HTTP_201_CREATED
+        assert invalid_token_response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_password_change_revokes_token(self, client, normal_user, api_token):
+        """
+        Tests that once a token signed after a password change was used, the
+        tokens signed before the change are rejected
+        """
+        request_url = reverse('meal_api:order-list', args=())
+        normal_user.set_password('NEW_PASSWORD')
+        normal_user.save()
+        new_api_token = client.post(
+            reverse('meal_api:api-token'),
+            {'email': normal_user.email, 'password': 'NEW_PASSWORD'},
+        ).json()['token']
+
+        client.credentials(HTTP_AUTHORIZATION=f'Token {new_api_token}')
+        new_token_response = client.get(request_url)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {api_token}')
+        old_token_response = client.get(request_url)
+
+        assert new_token_response.status_code == status.HTTP_200_OK
+        assert old_token_response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_cached_principal_has_no_password(
+        self,
+        client,
+        normal_user,
+        api_token,
+    ):
+        """
+        Tests that the principal cached for token authenticated requests
+        does not carry the password hash of the employee, and that the
+        employee is built back from it
+        """
+        client.credentials(HTTP_AUTHORIZATION=f'Token {api_token}')
+        client.get(reverse('meal_api:order-list', args=()))
+        client.get(reverse('meal_api:order-list', args=()))
+
+        principal = cache.get(get_api_token_principal_cache_key(normal_user.pk))
+        employee = load_api_token_principal(principal)
+
+        assert 'password' not in principal['fields']
+        assert normal_user.password not in str(principal)
+        assert (employee.pk, employee.email, employee.is_staff) == (
+            normal_user.pk,
+            normal_user.email,
+            normal_user.is_staff,
+        )
+        assert 'password' in employee.get_deferred_fields()
+
+    def test_api_token_request_throttling(self, client, normal_user):
+        """
+        Tests that the token requests of a client are throttled, so
+        passwords can't be guessed through the token view
+        """
+        request_url = reverse('meal_api:api-token')
+        responses = [
+            client.post(
+                request_url,
+                {'email': normal_user.email, 'password': 'WRONG_PASSWORD'},
+            )
+            for _ in range(11)
+        ]
+
+        assert {
+            response.status_code for response in responses[:10]
+        } == {status.HTTP_400_BAD_REQUEST}
+        assert responses[10].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_api_token_request_throttling_ignores_forwarded_for(
+        self,
+        client,
+    ):
+        """
+        Tests that rotating the X-Forwarded-For header does not get around
+        the throttle, the address of the client is the remote one
+        """
+        request_url = reverse('meal_api:api-token')
+        responses = [
+            client.post(
+                request_url,
+                {'email': f'employee-{index}@test.com', 'password': 'WRONG'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{index}',
+            )
+            for index in range(11)
+        ]
+
+        assert {
+            response.status_code for response in responses[:10]
+        } == {status.HTTP_400_BAD_REQUEST}
+        assert responses[10].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_api_token_request_throttling_by_email(self, client, normal_user):
+        """
+        Tests that the token requests for an email are throttled even when
+        they come from many addresses
+        """
+        request_url = reverse('meal_api:api-token')
+        responses = [
+            client.post(
+                request_url,
+                {'email': normal_user.email, 'password': 'WRONG_PASSWORD'},
+                REMOTE_ADDR=f'10.0.0.{index}',
+            )
+            for index in range(21)
+        ]
+        other_email_response = client.post(
+            request_url,
+            {'email': 'other@test.com', 'password': 'WRONG_PASSWORD'},
+            REMOTE_ADDR='10.0.1.1',
+        )
+
+        assert {
+            response.status_code for response in responses[:20]
+        } == {status.HTTP_400_BAD_REQUEST}
+        assert responses[20].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert other_email_response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,8 +1,20 @@
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from mixer.backend.django import mixer
+from mockito import (
+    when,
+    unstub,
+)
 from rest_framework import status
 
+from meal_api.models import (
+    Menu,
+    MenuOption,
+)
+
 
 @pytest.mark.django_db
 class TestMenuOptionView:
@@ -144,3 +156,153 @@ class TestMenuOptionView:
             responses.count(status.HTTP_404_NOT_FOUND)
             == len(tested_http_methods)
         )
+
+    def test_duplicated_option_number_request(
+        self,
+        client,
+        menu,
+        menu_option,
+        super_user,
+    ):
+        """
+        Tests that an http400 is returned when creating a menu option with an
+        option number that is already taken in the menu
+        """
+        request_url = reverse('meal_api:menu-option-list', args=(menu.uuid,))
+        payload = {
+            'option_number': menu_option.option_number,
+            'description': 'Corn pie, Salad and Dessert',
+        }
+
+        client.force_login(user=super_user)
+        response = client.post(request_url, payload)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_menu_options_request(
+        self,
+        client,
+        menu,
+        menu_option,
+        normal_user,
+        super_user,
+    ):
+        """
+        Tests that a list of menu options is applied in a single request:
+        PATCH creates and updates options keeping the ones left out, PUT
+        replaces the whole option set, duplicated option numbers are refused
+        and the endpoint is only allowed for the super_user
+        """
+        request_url = reverse('meal_api:menu-option-bulk', args=(menu.uuid,))
+        patch_payload = [
+            {'option_number': 2, 'description': 'Rice with chicken'},
+            {'option_number': 3, 'description': 'Vegan lasagna'},
+        ]
+        put_payload = [
+            {'option_number': 1, 'description': 'Corn pie'},
+            {'option_number': 3, 'description': 'Vegan lasagna'},
+        ]
+        duplicated_payload = [
+            {'option_number': 1, 'description': 'Corn pie'},
+            {'option_number': 1, 'description': 'Rice with chicken'},
+        ]
+
+        client.force_login(user=normal_user)
+        normal_user_response = client.put(
+            request_url,
+            put_payload,
+            format='json',
+        )
+
+        client.force_login(user=super_user)
+        patch_response = client.patch(
+            request_url,
+            patch_payload,
+            format='json',
+        )
+
+        put_response = client.put(request_url, put_payload, format='json')
+        duplicated_response = client.put(
+            request_url,
+            duplicated_payload,
+            format='json',
+        )
+
+        assert normal_user_response.status_code == status.HTTP_403_FORBIDDEN
+        assert patch_response.json() == [
+            {
+                'option_number': 1,
+                'description': menu_option.description,
+            },
+        ] + patch_payload
+        assert put_response.json() == put_payload
+        assert list(
+            menu.meal_options
+            .order_by('option_number')
+            .values('option_number', 'description'),
+        ) == put_payload
+        assert duplicated_response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_menu_options_queries_count(self, client, super_user):
+        """
+        Tests that the number of queries of a bulk request does not depend
+        on the number of meal options it applies
+        """
+        queries_counts = []
+        client.force_login(user=super_user)
+
+        for options_count in (2, 50):
+            menu = mixer.blend(Menu)
+            mixer.blend(MenuOption, menu=menu, option_number=1)
+            payload = [
+                {'option_number': idx, 'description': f'Option {idx}'}
+                for idx in range(1, options_count + 1)
+            ]
+
+            with CaptureQueriesContext(connection) as queries:
+                response = client.patch(
+                    reverse('meal_api:menu-option-bulk', args=(menu.uuid,)),
+                    payload,
+                    format='json',
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            queries_counts.append(len(queries))
+
+        assert queries_counts[0] == queries_counts[1]
+
+    def test_concurrently_taken_option_number_in_bulk_request(
+        self,
+        client,
+        menu,
+        super_user,
+    ):
+        """
+        Tests that an http400 is returned when a concurrent request creates
+        one of the option numbers of a bulk request before it's applied
+        """
+        request_url = reverse('meal_api:menu-option-bulk', args=(menu.uuid,))
+        payload = [
+            {'option_number': 1, 'description': 'Corn pie'},
+            {'option_number': 2, 'description': 'Rice with chicken'},
+        ]
+        bulk_create = MenuOption.objects.bulk_create
+
+        def concurrent_bulk_create(menu_options):
+            MenuOption.objects.create(
+                menu=menu,
+                option_number=2,
+                description='Vegan lasagna',
+            )
+
+            return bulk_create(menu_options)
+
+        client.force_login(user=super_user)
+        when(MenuOption.objects).bulk_create(...).thenAnswer(
+            concurrent_bulk_create,
+        )
+        response = client.put(request_url, payload, format='json')
+        unstub()
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not menu.meal_options.exists()
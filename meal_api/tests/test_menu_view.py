@@ -1,13 +1,24 @@
+import csv
+import io
+import json
 import pytest
 
 from django.urls import reverse
 from rest_framework import status
+from mixer.backend.django import mixer
 from mockito import (
     unstub,
     when,
 )
 
-from backend_test.tasks import send_menu_notification_by_slack
+from backend_test.tasks import (
+    resend_menu_notification,
+    send_menu_notification_by_slack,
+)
+from meal_api.models import (
+    MenuOption,
+    NotificationDelivery,
+)
 
 
 @pytest.mark.django_db
@@ -187,3 +198,289 @@ class TestMenuView:
         ]
 
         assert responses == expected_status_codes
+
+    def test_menu_conditional_requests(
+        self,
+        client,
+        menu,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that the menu detail and the menu orders responses carry an
+        etag and that an http304 is returned when it is sent back in the
+        If-None-Match header, while an updated menu gets a new etag
+        """
+        client.force_login(user=super_user)
+
+        menu_request_url = reverse('meal_api:menu-detail', args=(menu.uuid,))
+        orders_request_url = reverse(
+            'meal_api:menu-orders',
+            args=(menu_with_related_orders.uuid,),
+        )
+
+        menu_response = client.get(menu_request_url)
+        orders_response = client.get(orders_request_url)
+
+        menu_not_modified_response = client.get(
+            menu_request_url,
+            HTTP_IF_NONE_MATCH=menu_response['ETag'],
+        )
+        orders_not_modified_response = client.get(
+            orders_request_url,
+            HTTP_IF_NONE_MATCH=orders_response['ETag'],
+        )
+
+        client.put(menu_request_url, {'date': '2021-01-01'})
+        menu_modified_response = client.get(
+            menu_request_url,
+            HTTP_IF_NONE_MATCH=menu_response['ETag'],
+        )
+
+        assert (
+            menu_not_modified_response.status_code
+            == status.HTTP_304_NOT_MODIFIED
+        )
+        assert (
+            orders_not_modified_response.status_code
+            == status.HTTP_304_NOT_MODIFIED
+        )
+        assert menu_modified_response.status_code == status.HTTP_200_OK
+        assert menu_modified_response['ETag'] != menu_response['ETag']
+
+    def test_menu_notification_progress(self, client, menu, super_user):
+        """
+        Tests that the notification progress of a menu can be requested by
+        the super_user, reporting no deliveries for a menu not notified yet
+        """
+        client.force_login(user=super_user)
+
+        response = client.get(
+            reverse('meal_api:menu-notification-progress', args=(menu.uuid,)),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'total': 0,
+            'delivered': 0,
+            'failed': 0,
+            'pending': 0,
+            'sending': 0,
+        }
+
+    def test_menu_notification_resending(
+        self,
+        client,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that resending the notification of a menu reports the
+        undelivered notifications and only dispatches the resending task
+        when there is any of them
+        """
+        menu = menu_with_related_orders
+        request_url = reverse(
+            'meal_api:menu-resend-notification',
+            args=(menu.uuid,),
+        )
+        notification_deliveries = [
+            mixer.blend(
+                NotificationDelivery,
+                menu=menu,
+                employee=order.employee,
+                status=NotificationDelivery.DELIVERED,
+            )
+            for order in menu.orders
+        ]
+
+        client.force_login(user=super_user)
+        when(resend_menu_notification).delay(...).thenReturn(True)
+
+        delivered_response = client.post(request_url)
+
+        NotificationDelivery.objects.filter(
+            pk__in=[
+                notification_delivery.pk
+                for notification_delivery in notification_deliveries[:3]
+            ],
+        ).update(status=NotificationDelivery.FAILED)
+        undelivered_response = client.post(request_url)
+        unstub()
+
+        assert delivered_response.status_code == status.HTTP_200_OK
+        assert delivered_response.json()['detail'].startswith('Resending 0 ')
+        assert undelivered_response.status_code == status.HTTP_200_OK
+        assert undelivered_response.json()['detail'].startswith('Resending 3 ')
+
+    def test_menu_orders_pagination(
+        self,
+        client,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that the orders of a menu are paginated by cursor, following
+        the next links must return every order exactly once
+        """
+        client.force_login(user=super_user)
+
+        request_url = reverse(
+            'meal_api:menu-orders',
+            args=(menu_with_related_orders.uuid,),
+        ) + '?page_size=3'
+        orders_ids = []
+        pages_count = 0
+
+        while request_url:
+            response = client.get(request_url)
+            orders_ids += [order['id'] for order in response.json()['results']]
+            request_url = response.json()['next']
+            pages_count += 1
+
+        assert pages_count == 4
+        assert orders_ids == sorted(
+            order.pk for order in menu_with_related_orders.orders
+        )
+
+    def test_menu_orders_pages_etags(
+        self,
+        client,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that every page of the orders of a menu has an etag of its
+        own, so the etag of a page never answers the request of another
+        """
+        client.force_login(user=super_user)
+        request_url = reverse(
+            'meal_api:menu-orders',
+            args=(menu_with_related_orders.uuid,),
+        )
+
+        first_page_response = client.get(request_url, {'page_size': 3})
+        etag = first_page_response['ETag']
+        second_page_response = client.get(
+            first_page_response.json()['next'],
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        other_page_size_response = client.get(
+            request_url,
+            {'page_size': 4},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        not_modified_response = client.get(
+            request_url,
+            {'page_size': 3},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        assert second_page_response.status_code == status.HTTP_200_OK
+        assert second_page_response['ETag'] != etag
+        assert (
+            second_page_response.json()['results']
+            != first_page_response.json()['results']
+        )
+        assert other_page_size_response.status_code == status.HTTP_200_OK
+        assert len(other_page_size_response.json()['results']) == 4
+        assert (
+            not_modified_response.status_code
+            == status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_menu_orders_streaming(
+        self,
+        client,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that every order of a menu is streamed as newline delimited
+        json when requested with a true stream query param, and paginated
+        when it's false
+        """
+        client.force_login(user=super_user)
+
+        response = client.get(
+            reverse(
+                'meal_api:menu-orders',
+                args=(menu_with_related_orders.uuid,),
+            ),
+            {'stream': 'true'},
+        )
+        not_streamed_response = client.get(
+            reverse(
+                'meal_api:menu-orders',
+                args=(menu_with_related_orders.uuid,),
+            ),
+            {'stream': 'false'},
+        )
+        streamed_orders = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert [order['id'] for order in streamed_orders] == sorted(
+            order.pk for order in menu_with_related_orders.orders
+        )
+        assert not_streamed_response.status_code == status.HTTP_200_OK
+        assert 'results' in not_streamed_response.json()
+
+    def test_menu_orders_export(
+        self,
+        client,
+        menu_with_related_orders,
+        super_user,
+    ):
+        """
+        Tests that the orders of a menu are exported as csv and as newline
+        delimited json, joined with the employee name and the description
+        of the selected option
+        """
+        client.force_login(user=super_user)
+
+        menu_with_related_orders.orders.update(selected_option=1)
+        menu_option = mixer.blend(
+            MenuOption,
+            menu=menu_with_related_orders,
+            option_number=1,
+        )
+        request_url = reverse(
+            'meal_api:menu-export',
+            args=(menu_with_related_orders.uuid,),
+        )
+
+        csv_response = client.get(request_url)
+        ndjson_response = client.get(request_url, {'export_format': 'ndjson'})
+        invalid_format_response = client.get(
+            request_url,
+            {'export_format': 'xlsx'},
+        )
+
+        csv_rows = list(csv.DictReader(
+            io.StringIO(b''.join(csv_response.streaming_content).decode()),
+        ))
+        ndjson_rows = [
+            json.loads(line)
+            for line in b''.join(ndjson_response.streaming_content).splitlines()
+        ]
+        orders = menu_with_related_orders.orders.order_by('pk')
+
+        assert csv_response['Content-Type'] == 'text/csv'
+        assert [row['employee_name'] for row in csv_rows] == [
+            order.employee.name for order in orders
+        ]
+        assert all(
+            row['option_description'] == menu_option.description
+            for row in csv_rows + ndjson_rows
+        )
+        assert [row['order_id'] for row in ndjson_rows] == [
+            order.pk for order in orders
+        ]
+        assert (
+            invalid_format_response.status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
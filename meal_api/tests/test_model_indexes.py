@@ -0,0 +1,64 @@
+import pytest
+
+from django.db import connection
+
+from meal_api.models import (
+    Menu,
+    MenuOption,
+    Order,
+)
+
+
+@pytest.mark.django_db
+class TestModelIndexes:
+
+    def get_query_plan(self, queryset):
+        """
+        Returns the EXPLAIN output of the queryset, sequential scans are
+        disabled for the current transaction since the test tables are
+        too small for the planner to prefer an index otherwise
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        return queryset.explain()
+
+    def test_order_duplicate_check_uses_index(self, order):
+        """
+        Tests that looking up the order of an employee in a menu is resolved
+        with the (employee, menu) unique constraint index
+        """
+        query_plan = self.get_query_plan(
+            Order.objects.filter(employee=order.employee, menu=order.menu),
+        )
+
+        assert 'unique_employee_menu_order' in query_plan
+
+    def test_menu_option_lookup_uses_index(self, menu_option):
+        """
+        Tests that looking up a menu option by number is resolved with the
+        (menu, option_number) unique constraint index
+        """
+        query_plan = self.get_query_plan(
+            MenuOption.objects.filter(
+                menu_id=menu_option.menu_id,
+                option_number=menu_option.option_number,
+            ),
+        )
+
+        assert 'unique_menu_option_number' in query_plan
+
+    def test_published_menu_lookup_uses_index(self, public_menu):
+        """
+        Tests that published menus lookups are resolved with the uuid unique
+        index and menus by date lookups with the date index
+        """
+        published_menu_query_plan = self.get_query_plan(
+            Menu.objects.filter(uuid=public_menu.uuid, is_published=True),
+        )
+        menu_by_date_query_plan = self.get_query_plan(
+            Menu.objects.filter(date=public_menu.date),
+        )
+
+        assert 'meal_api_menu_uuid_key' in published_menu_query_plan
+        assert 'menu_date_idx' in menu_by_date_query_plan
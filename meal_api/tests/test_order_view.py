@@ -1,4 +1,5 @@
 import pytest
+import uuid
 
 from datetime import time
 
@@ -60,6 +61,35 @@ class TestOrdersView:
             == status.HTTP_201_CREATED
         )
 
+    def test_duplicated_order_request(self, client, normal_user, menu):
+        """
+        Tests that an http400 response is returned when the user tries to
+        order twice in the same menu, keeping a single order registered
+        """
+        request_url = reverse('meal_api:order-list', args=())
+
+        payload = {
+            'selected_option': 1,
+            'customizations': 'TEST',
+            'menu': menu.uuid,
+        }
+        client.force_login(user=normal_user)
+
+        when(datetime_utils).get_time_now(...).thenReturn(time(hour=10))
+        first_order_response = client.post(request_url, payload)
+        duplicated_order_response = client.post(request_url, payload)
+        unstub()
+
+        assert first_order_response.status_code == status.HTTP_201_CREATED
+        assert (
+            duplicated_order_response.status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+        assert Order.objects.filter(
+            employee=normal_user,
+            menu=menu,
+        ).count() == 1
+
     def test_orders_visibility(
         self,
         client,
@@ -88,17 +118,19 @@ class TestOrdersView:
         # corresponds to the normal_user or not i.e [True, False, True, True]
         normal_user_orders = []
 
-        for order_json in normal_user_orders_response.json():
+        for order_json in normal_user_orders_response.json()['results']:
             order = Order.objects.get(pk=order_json['id'])
             order_belongs_to_normal_user = order.employee.id == normal_user.pk
             normal_user_orders.append(order_belongs_to_normal_user)
 
         assert all(normal_user_orders)
-        assert len(normal_user_orders_response.json()) == Order.objects.filter(
+        assert len(
+            normal_user_orders_response.json()['results'],
+        ) == Order.objects.filter(
             employee__pk=normal_user.pk,
         ).count()
         assert (
-            len(super_user_orders_response.json())
+            len(super_user_orders_response.json()['results'])
             == Order.objects.all().count()
         )
 
@@ -224,3 +256,53 @@ class TestOrdersView:
             responses.count(status.HTTP_404_NOT_FOUND)
             == len(tested_http_methods)
         )
+
+    def test_order_placement_query_count(
+        self,
+        client,
+        django_assert_num_queries,
+        menu,
+        normal_user,
+    ):
+        """
+        Tests that placing an order takes a single query besides the ones
+        made to authenticate the user, and that ordering in a menu that
+        does not exist returns an http404
+        """
+        request_url = reverse('meal_api:order-list', args=())
+        payload = {
+            'selected_option': 1,
+            'customizations': 'TEST',
+            'menu': menu.uuid,
+        }
+        unexisting_menu_payload = {
+            'selected_option': 1,
+            'customizations': 'TEST',
+            'menu': uuid.uuid4(),
+        }
+        client.force_login(user=normal_user)
+
+        when(datetime_utils).get_time_now(...).thenReturn(time(hour=10))
+        # user lookup made by the session authentication, the session is
+        # read from the cache
+        authentication_queries_count = 1
+
+        with django_assert_num_queries(authentication_queries_count + 1):
+            order_response = client.post(request_url, payload)
+
+        unexisting_menu_response = client.post(
+            request_url,
+            unexisting_menu_payload,
+        )
+        unstub()
+
+        order = Order.objects.get(pk=order_response.json()['id'])
+
+        assert order_response.status_code == status.HTTP_201_CREATED
+        assert order_response.json()['menu'] == str(menu.uuid)
+        assert order.employee == normal_user
+        assert order.selected_option == 1
+        assert (
+            unexisting_menu_response.status_code
+            == status.HTTP_404_NOT_FOUND
+        )
@@ -2,8 +2,25 @@ import pytest
 import uuid
 
 from django.urls import reverse
+from mixer.backend.django import mixer
+from mockito import (
+    when,
+    unstub,
+)
 from rest_framework import status
 
+from meal_api import cache as cache_module
+from meal_api.cache import (
+    build_public_menu_data,
+    cache_public_menu,
+    get_public_menu_generation,
+    invalidate_public_menu,
+)
+from meal_api.models import (
+    Menu,
+    MenuOption,
+)
+
 
 @pytest.mark.django_db
 class TestPublicMenuView:
@@ -49,3 +66,145 @@ class TestPublicMenuView:
             unexisting_menu_response.status_code
             == status.HTTP_404_NOT_FOUND
         )
+
+    def test_public_menu_is_served_from_cache(
+        self,
+        client,
+        django_assert_num_queries,
+        public_menu,
+    ):
+        """
+        Tests that once a public menu has been requested, the following
+        requests are answered from the cache without querying the database
+        """
+        request_url = reverse('public-menu', args=(public_menu.uuid,))
+        first_response = client.get(request_url)
+
+        with django_assert_num_queries(0):
+            cached_response = client.get(request_url)
+
+        assert cached_response.status_code == status.HTTP_200_OK
+        assert cached_response.json() == first_response.json()
+
+    def test_public_menu_cache_invalidation(
+        self,
+        client,
+        public_menu,
+        super_user,
+    ):
+        """
+        Tests that creating, updating or deleting a meal option drops the
+        cached public menu so the next request returns the new options
+        """
+        request_url = reverse('public-menu', args=(public_menu.uuid,))
+        options_request_url = reverse(
+            'meal_api:menu-option-list',
+            args=(public_menu.uuid,),
+        )
+        option_request_url = reverse(
+            'meal_api:menu-option-detail',
+            args=(public_menu.uuid, 1),
+        )
+        payload = {
+            'option_number': 1,
+            'description': 'Corn pie, Salad and Dessert',
+        }
+        updated_payload = {
+            'option_number': 1,
+            'description': 'Rice with chicken',
+        }
+
+        empty_menu_response = client.get(request_url)
+
+        client.force_login(user=super_user)
+        client.post(options_request_url, payload)
+        created_option_response = client.get(request_url)
+
+        client.put(option_request_url, updated_payload)
+        updated_option_response = client.get(request_url)
+
+        client.delete(option_request_url)
+        deleted_option_response = client.get(request_url)
+
+        assert empty_menu_response.json()['Menu meal options'] == []
+        assert created_option_response.json()['Menu meal options'] == [payload]
+        assert (
+            updated_option_response.json()['Menu meal options']
+            == [updated_payload]
+        )
+        assert deleted_option_response.json()['Menu meal options'] == []
+
+    def test_stale_public_menu_is_not_cached_after_invalidation(
+        self,
+        client,
+        public_menu,
+    ):
+        """
+        Tests that a menu rendered before one of its options changed, and
+        cached only after the change invalidated it, is never served
+        """
+        request_url = reverse('public-menu', args=(public_menu.uuid,))
+        stale_response = client.get(request_url)
+        generation = get_public_menu_generation(public_menu.uuid)
+        stale_menu = Menu.objects.get(pk=public_menu.pk)
+        stale_menu_data = build_public_menu_data(stale_menu)
+
+        mixer.blend(
+            MenuOption,
+            menu=public_menu,
+            option_number=1,
+            description='Corn pie, Salad and Dessert',
+        )
+        public_menu.touch()
+        invalidate_public_menu(public_menu.uuid)
+
+        # the stale render is only written once the menu was invalidated
+        when(cache_module).build_public_menu_data(stale_menu).thenReturn(
+            stale_menu_data,
+        )
+        cache_public_menu(stale_menu, generation)
+        unstub()
+        response = client.get(request_url)
+
+        assert stale_response.json()['Menu meal options'] == []
+        assert response.json() == build_public_menu_data(public_menu)
+        assert response['ETag'] != stale_response['ETag']
+
+    def test_public_menu_conditional_request(
+        self,
+        client,
+        django_assert_num_queries,
+        public_menu,
+        super_user,
+    ):
+        """
+        Tests that the public menu is returned with an etag, that an http304
+        is returned without querying the database when the etag sent in the
+        If-None-Match header matches and that the etag changes once the menu
+        options are modified
+        """
+        request_url = reverse('public-menu', args=(public_menu.uuid,))
+        response = client.get(request_url)
+        etag = response['ETag']
+
+        with django_assert_num_queries(0):
+            not_modified_response = client.get(
+                request_url,
+                HTTP_IF_NONE_MATCH=etag,
+            )
+
+        client.force_login(user=super_user)
+        client.post(
+            reverse('meal_api:menu-option-list', args=(public_menu.uuid,)),
+            {'option_number': 1, 'description': 'Corn pie'},
+        )
+        client.logout()
+
+        modified_response = client.get(request_url, HTTP_IF_NONE_MATCH=etag)
+
+        assert 'public' in response['Cache-Control']
+        assert 'no-store' not in response['Cache-Control']
+        assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified_response['ETag'] == etag
+        assert modified_response.status_code == status.HTTP_200_OK
+        assert modified_response['ETag'] != etag
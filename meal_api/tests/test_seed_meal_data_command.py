@@ -0,0 +1,93 @@
+import pytest
+
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from meal_api.management.commands.seed_meal_data import MENUS_START_DATE
+from meal_api.models import (
+    Employee,
+    Menu,
+    MenuOption,
+    Order,
+)
+
+
+def get_seeded_data():
+    return {
+        'employees': list(
+            Employee.objects
+            .order_by('email')
+            .values_list('email', 'password', 'nationality', 'slack_web_hook')
+        ),
+        'menus': list(Menu.objects.order_by('date').values_list('date', 'uuid')),
+        'options': MenuOption.objects.count(),
+        'orders': list(
+            Order.objects
+            .order_by('menu__date', 'employee__email')
+            .values_list(
+                'employee__email',
+                'menu__date',
+                'selected_option',
+                'customizations',
+            )
+        ),
+    }
+
+
+def delete_seeded_data():
+    Order.objects.all().delete()
+    MenuOption.objects.all().delete()
+    Menu.objects.all().delete()
+    Employee.objects.all().delete()
+
+
+@pytest.mark.django_db
+class TestSeedMealDataCommand:
+
+    def test_seed_meal_data(self):
+        """
+        Tests that the requested volumes are seeded, every employee sharing
+        a usable password, and that the same seed generates the same data,
+        menus being dated from a fixed day unless another one is given
+        """
+        seed_options = {'employees': 50, 'menus': 7, 'orders': 200, 'seed': 3}
+
+        call_command('seed_meal_data', password='secret', **seed_options)
+        seeded_data = get_seeded_data()
+        employee = Employee.objects.get(email='employee0@seed.local')
+        delete_seeded_data()
+        call_command('seed_meal_data', password='secret', **seed_options)
+        reseeded_data = get_seeded_data()
+        delete_seeded_data()
+        call_command(
+            'seed_meal_data',
+            '--start-date=2022-03-01',
+            password='secret',
+            **seed_options,
+        )
+        start_date_menus = get_seeded_data()['menus']
+
+        assert len(seeded_data['employees']) == 50
+        assert len(seeded_data['menus']) == 7
+        assert seeded_data['options'] == 7 * 4
+        assert len(seeded_data['orders']) == 200
+        assert len({password for _, password, _, _ in seeded_data['employees']}) == 1
+        assert employee.check_password('secret')
+        assert reseeded_data == seeded_data
+        assert seeded_data['menus'][0][0] == MENUS_START_DATE
+        assert [menu_date for menu_date, _ in start_date_menus] == [
+            date(2022, 3, day) for day in range(1, 8)
+        ]
+
+    def test_seed_meal_data_twice(self):
+        """
+        Tests that seeding an already seeded database is refused and that
+        the orders are capped to one per employee and menu
+        """
+        call_command('seed_meal_data', employees=3, menus=2, orders=100)
+
+        with pytest.raises(CommandError):
+            call_command('seed_meal_data', employees=3, menus=2, orders=100)
+        assert Order.objects.count() == 3 * 2
@@ -0,0 +1,21 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ApiTokenEmailRateThrottle(SimpleRateThrottle):
+    """
+    Throttles the token requests by the submitted email, so the password of
+    an employee can't be guessed spreading the requests over many addresses
+    """
+    scope = 'api-token-email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+
+        if not isinstance(email, str) or not email.strip():
+            # rejected by the serializer, the address throttle still applies
+            return None
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': email.strip().lower(),
+        }
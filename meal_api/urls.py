@@ -1,7 +1,9 @@
 # from rest_framework import routers
+from django.urls import path
 from rest_framework_nested import routers
 
 from .views import (
+    ApiTokenView,
     MenuViewSet,
     MenuOptionViewSet,
     OrderViewSet,
@@ -21,4 +23,6 @@ menus_router.register('options', MenuOptionViewSet, basename='menu-option')
 
 app_name = 'meal_api'
 
-urlpatterns = router.urls + menus_router.urls
+urlpatterns = [
+    path('auth/token/', ApiTokenView.as_view(), name='api-token'),
+] + router.urls + menus_router.urls
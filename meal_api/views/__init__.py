@@ -1,11 +1,15 @@
+from .api_token_view import ApiTokenView
 from .menu_viewset import MenuViewSet
 from .menu_option_viewset import MenuOptionViewSet
 from .order_viewset import OrderViewSet
 from .public_menu_view import PublicMenuView
+from .async_public_menu_view import async_public_menu_view
 
 __all__ = [
+    'ApiTokenView',
     'MenuViewSet',
     'MenuOptionViewSet',
     'OrderViewSet',
     'PublicMenuView',
+    'async_public_menu_view',
 ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.contrib.auth import authenticate
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+from rest_framework import (
+    permissions,
+    status,
+)
+
+from meal_api.authentication import create_api_token
+from meal_api.serializers import ApiTokenSerializer
+from meal_api.throttling import ApiTokenEmailRateThrottle
+
+
+class ApiTokenView(APIView):
+    """
+    Exchanges the credentials of an employee for a signed api token, meant
+    for API clients such as bots and kitchen tablets, which then
+    authenticate with an `Authorization: Token <token>` header. Requests
+    are throttled by client address and by submitted email so passwords
+    can't be guessed through it
+    """
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = (ScopedRateThrottle, ApiTokenEmailRateThrottle)
+    throttle_scope = 'api-token'
+
+    def post(self, request):
+        api_token_serializer = ApiTokenSerializer(data=request.data)
+        api_token_serializer.is_valid(raise_exception=True)
+
+        employee = authenticate(
+            request=request,
+            email=api_token_serializer.validated_data['email'],
+            password=api_token_serializer.validated_data['password'],
+        )
+
+        if employee is None:
+            return Response(
+                {"detail": "Unable to log in with the provided credentials."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                'token': create_api_token(employee),
+                'expires_in': settings.API_TOKEN_MAX_AGE,
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,61 @@
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from backend_test.utils.http_utils import (
+    get_etag,
+    get_not_modified_response,
+    set_conditional_headers,
+)
+from meal_api.cache import get_cached_public_menu_async
+
+JSON_MEDIA_TYPES = ('application/json', '*/*')
+
+
+def accepts_json(request):
+    """
+    Tells whether the json renderer is the one PublicMenuView would pick
+    for the request, that is when json or anything is preferred
+    """
+    accept = request.META.get('HTTP_ACCEPT', '')
+    preferred_media_type = accept.split(',')[0].split(';')[0].strip()
+
+    return not preferred_media_type or preferred_media_type in JSON_MEDIA_TYPES
+
+
+async def async_public_menu_view(request, menu_uuid):
+    """
+    Coroutine counterpart of PublicMenuView served under ASGI, answers the
+    json requests of the menus found in the cache without blocking the event
+    loop. Returns None for anything else so PublicMenuView handles it
+    """
+    if request.GET or not accepts_json(request):
+        return None
+
+    cached_menu = await get_cached_public_menu_async(menu_uuid)
+
+    if cached_menu is None:
+        return None
+
+    etag = get_etag(cached_menu['version'], JSONRenderer.format)
+    not_modified_response = get_not_modified_response(
+        request,
+        etag,
+        cached_menu['updated_at'],
+        public=True,
+    )
+
+    if not_modified_response is not None:
+        return not_modified_response
+
+    response = HttpResponse(
+        JSONRenderer().render(cached_menu['data']),
+        content_type=JSONRenderer.media_type,
+    )
+    response['Allow'] = 'GET, HEAD, OPTIONS'
+
+    return set_conditional_headers(
+        response,
+        etag,
+        cached_menu['updated_at'],
+        public=True,
+    )
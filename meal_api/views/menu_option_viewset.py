@@ -1,5 +1,10 @@
+from django.db import (
+    IntegrityError,
+    transaction,
+)
 from django.shortcuts import get_object_or_404
 
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import (
@@ -7,6 +12,13 @@ from rest_framework import (
     status,
 )
 
+from backend_test.utils.db_utils import is_unique_violation
+from backend_test.utils.http_utils import (
+    get_etag,
+    get_not_modified_response,
+    set_conditional_headers,
+)
+from meal_api.cache import invalidate_public_menu
 from meal_api.models import (
     Menu,
     MenuOption,
@@ -20,15 +32,40 @@ class MenuOptionViewSet(ModelViewSet):
     permission_classes = (permissions.IsAdminUser,)
     lookup_field = 'option_number'
 
+    def option_number_taken_response(self, menu, option_number):
+        return Response(
+            {
+                "detail": (
+                    f"Option number {option_number} is already taken in "
+                    f"{menu}, you might want to edit the existing option."
+                ),
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     def list(self, request, menu_uuid):
         menu = get_object_or_404(Menu, uuid=menu_uuid)
+        etag = get_etag(menu.version, request.accepted_renderer.format)
+        not_modified_response = get_not_modified_response(
+            request,
+            etag,
+            menu.updated_at,
+        )
+
+        if not_modified_response is not None:
+            return not_modified_response
+
         menu_meal_options = [
             self.serializer_class(menu_option).data
             for menu_option in menu.meal_options
         ]
 
         if len(menu_meal_options):
-            return Response(menu_meal_options, status=status.HTTP_200_OK)
+            return set_conditional_headers(
+                Response(menu_meal_options, status=status.HTTP_200_OK),
+                etag,
+                menu.updated_at,
+            )
         else:
             return Response(
                 {"detail": f"No meal options assigned to {menu} yet"},
@@ -40,12 +77,21 @@ class MenuOptionViewSet(ModelViewSet):
         menu_option_description = request.data.get('description')
         menu_option_number = request.data.get('option_number')
 
-        menu_option = MenuOption.objects.create(
-            description=menu_option_description,
-            option_number=menu_option_number,
-            menu=menu,
-        )
-        menu_option.save()
+        try:
+            with transaction.atomic():
+                menu_option = MenuOption.objects.create(
+                    description=menu_option_description,
+                    option_number=menu_option_number,
+                    menu=menu,
+                )
+        except IntegrityError as e:
+            if not is_unique_violation(e):
+                raise
+
+            return self.option_number_taken_response(menu, menu_option_number)
+
+        Menu.objects.filter(pk=menu.pk).touch()
+        invalidate_public_menu(menu.uuid)
 
         return Response(
             self.serializer_class(menu_option).data,
@@ -72,7 +118,21 @@ class MenuOptionViewSet(ModelViewSet):
         )
         menu_option.option_number = request.data.get('option_number')
         menu_option.description = request.data.get('description')
-        menu_option.save()
+
+        try:
+            with transaction.atomic():
+                menu_option.save()
+        except IntegrityError as e:
+            if not is_unique_violation(e):
+                raise
+
+            return self.option_number_taken_response(
+                menu_option.menu,
+                menu_option.option_number,
+            )
+
+        Menu.objects.filter(uuid=menu_uuid).touch()
+        invalidate_public_menu(menu_uuid)
 
         return Response(
             self.serializer_class(menu_option).data,
@@ -86,5 +146,117 @@ class MenuOptionViewSet(ModelViewSet):
             option_number=option_number,
         )
         menu_option.delete()
+        Menu.objects.filter(uuid=menu_uuid).touch()
+        invalidate_public_menu(menu_uuid)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['PUT', 'PATCH'], url_path='bulk')
+    def bulk(self, request, menu_uuid):
+        """
+        Applies a list of meal options to the menu in a single transaction,
+        options are matched by option number: existing ones are updated and
+        new ones created, on PUT the options left out of the list are also
+        deleted so the menu ends up with exactly the given options.
+        Returns the resulting options of the menu
+        """
+        menu = get_object_or_404(Menu, uuid=menu_uuid)
+        menu_options_serializer = self.serializer_class(
+            data=request.data,
+            many=True,
+        )
+        menu_options_serializer.is_valid(raise_exception=True)
+
+        descriptions = {
+            menu_option['option_number']: menu_option['description']
+            for menu_option in menu_options_serializer.validated_data
+        }
+
+        if len(descriptions) < len(menu_options_serializer.validated_data):
+            return Response(
+                {"detail": "Option numbers must be unique"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            menu_options = self.apply_menu_options(
+                menu,
+                descriptions,
+                replace=request.method == 'PUT',
+            )
+        except IntegrityError as e:
+            if not is_unique_violation(e):
+                raise
+
+            # the existing options are locked, yet a concurrent request may
+            # still have created one of the new option numbers meanwhile
+            return Response(
+                {
+                    "detail": (
+                        f"The meal options of {menu} were changed by another "
+                        "request, try again."
+                    ),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        invalidate_public_menu(menu.uuid)
+
+        return Response(
+            self.serializer_class(
+                [
+                    menu_options[option_number]
+                    for option_number in sorted(menu_options)
+                ],
+                many=True,
+            ).data,
+            status=status.HTTP_200_OK,
+        )
+
+    def apply_menu_options(self, menu, descriptions, replace):
+        """
+        Updates and creates the meal options of the menu from a mapping of
+        option number to description, when replacing the options left out
+        of the mapping are deleted. Returns the resulting options of the
+        menu by option number
+        """
+        with transaction.atomic():
+            menu_options = {
+                menu_option.option_number: menu_option
+                for menu_option in menu.meal_options.select_for_update()
+            }
+            updated_menu_options = []
+            created_menu_options = []
+
+            for option_number, description in descriptions.items():
+                menu_option = menu_options.get(option_number)
+
+                if menu_option is None:
+                    menu_option = MenuOption(
+                        menu=menu,
+                        option_number=option_number,
+                        description=description,
+                    )
+                    created_menu_options.append(menu_option)
+                    menu_options[option_number] = menu_option
+                elif menu_option.description != description:
+                    menu_option.description = description
+                    updated_menu_options.append(menu_option)
+
+            if replace:
+                deleted_option_numbers = set(menu_options) - set(descriptions)
+                MenuOption.objects.filter(
+                    pk__in=[
+                        menu_options.pop(option_number).pk
+                        for option_number in deleted_option_numbers
+                    ],
+                ).delete()
+
+            MenuOption.objects.bulk_update(
+                updated_menu_options,
+                ['description'],
+            )
+            MenuOption.objects.bulk_create(created_menu_options)
+            Menu.objects.filter(pk=menu.pk).touch()
+
+        return menu_options
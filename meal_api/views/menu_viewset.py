@@ -1,17 +1,51 @@
+import csv
+import itertools
+import json
+
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import (
+    Count,
+    Max,
+    OuterRef,
+    Subquery,
+)
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.fields import BooleanField
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import (
     permissions,
     status,
 )
+from rest_framework.utils.encoders import JSONEncoder
 
+from backend_test.utils.db_utils import iterate_in_batches
+from backend_test.utils.http_utils import (
+    Echo,
+    get_etag,
+    get_not_modified_response,
+    set_conditional_headers,
+)
+from meal_api.cache import (
+    cache_public_menu,
+    invalidate_public_menu,
+)
+from meal_api.pagination import OrderCursorPagination
 from meal_api.serializers import (
     OrderSerializer,
     MenuSerializer,
 )
-from meal_api.models import Menu
-from backend_test.tasks import send_menu_notification_by_slack
+from meal_api.models import (
+    Menu,
+    MenuOption,
+)
+from backend_test.tasks import (
+    resend_menu_notification,
+    send_menu_notification_by_slack,
+)
 
 
 class MenuViewSet(ModelViewSet):
@@ -20,21 +54,182 @@ class MenuViewSet(ModelViewSet):
     permission_classes = (permissions.IsAdminUser,)
     lookup_field = 'uuid'
 
+    EXPORT_CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+    EXPORT_COLUMNS = (
+        'id',
+        'employee__name',
+        'employee__email',
+        'selected_option',
+        'option_description',
+        'customizations',
+    )
+    EXPORT_HEADER = (
+        'order_id',
+        'employee_name',
+        'employee_email',
+        'selected_option',
+        'option_description',
+        'customizations',
+    )
+
+    def retrieve(self, request, uuid=None):
+        menu = self.get_object()
+        etag = get_etag(menu.version, request.accepted_renderer.format)
+        not_modified_response = get_not_modified_response(
+            request,
+            etag,
+            menu.updated_at,
+        )
+
+        if not_modified_response is not None:
+            return not_modified_response
+
+        return set_conditional_headers(
+            Response(self.get_serializer(menu).data, status=status.HTTP_200_OK),
+            etag,
+            menu.updated_at,
+        )
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        serializer.instance.touch()
+        invalidate_public_menu(serializer.instance.uuid)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_public_menu(instance.uuid)
+
     @action(detail=True)
     def orders(self, request, uuid=None):
+        """
+        Lists the orders of the menu paginated by cursor, or streams all of
+        them as newline delimited json when requested with ?stream=true
+        """
         menu = self.get_object()
-        orders = [
-            OrderSerializer(order).data
-            for order in menu.orders
-        ]
+        # orders have no version of their own, their count and latest
+        # modification are enough to tell whether the list changed
+        orders_summary = menu.orders.aggregate(
+            orders_count=Count('id'),
+            last_modified=Max('updated_at'),
+        )
 
-        if len(orders):
-            return Response(orders, status=status.HTTP_200_OK)
-        else:
+        if not orders_summary['orders_count']:
             return Response(
                 {"detail": f"No orders found for {menu}"},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        elif (
+            request.query_params.get('stream', '').lower()
+            in BooleanField.TRUE_VALUES
+        ):
+            return self.stream_orders(menu)
+
+        paginator = OrderCursorPagination()
+        # every page has an etag of its own
+        etag = get_etag(
+            orders_summary['orders_count'],
+            orders_summary['last_modified'].timestamp(),
+            request.query_params.get(paginator.cursor_query_param, ''),
+            paginator.get_page_size(request),
+            request.accepted_renderer.format,
+        )
+        not_modified_response = get_not_modified_response(
+            request,
+            etag,
+            orders_summary['last_modified'],
+        )
+
+        if not_modified_response is not None:
+            return not_modified_response
+
+        orders_page = paginator.paginate_queryset(
+            menu.orders,
+            request,
+            view=self,
+        )
+
+        return set_conditional_headers(
+            paginator.get_paginated_response(
+                OrderSerializer(orders_page, many=True).data,
+            ),
+            etag,
+            orders_summary['last_modified'],
+        )
+
+    def stream_orders(self, menu):
+        """
+        Streams every order of the menu as newline delimited json, orders
+        are read in batches so memory stays flat for menus of any size
+        """
+        json_encoder = JSONEncoder()
+        orders = iterate_in_batches(
+            menu.orders,
+            settings.ORDERS_STREAM_BATCH_SIZE,
+        )
+
+        return StreamingHttpResponse(
+            (
+                json_encoder.encode(OrderSerializer(order).data) + '\n'
+                for order in orders
+            ),
+            content_type='application/x-ndjson',
+        )
+
+    @action(detail=True)
+    def export(self, request, uuid=None):
+        """
+        Streams every order of the menu joined with the employee name and
+        the description of the selected option, as csv (default) or as
+        newline delimited json when requested with ?export_format=ndjson
+        """
+        menu = self.get_object()
+        export_format = request.query_params.get('export_format', 'csv')
+
+        if export_format not in self.EXPORT_CONTENT_TYPES:
+            return Response(
+                {
+                    "detail": (
+                        f"Unsupported export format {export_format}, choose "
+                        f"one of {', '.join(self.EXPORT_CONTENT_TYPES)}"
+                    ),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        selected_option_description = MenuOption.objects.filter(
+            menu_id=menu.pk,
+            option_number=OuterRef('selected_option'),
+        ).values('description')[:1]
+        orders = iterate_in_batches(
+            menu.orders
+            .annotate(option_description=Subquery(selected_option_description))
+            .values_list(*self.EXPORT_COLUMNS),
+            settings.ORDERS_STREAM_BATCH_SIZE,
+            get_pk=itemgetter(0),
+        )
+
+        if export_format == 'csv':
+            csv_writer = csv.writer(Echo())
+            rows = itertools.chain([self.EXPORT_HEADER], orders)
+            content = (csv_writer.writerow(row) for row in rows)
+        else:
+            content = (
+                json.dumps(dict(zip(self.EXPORT_HEADER, row))) + '\n'
+                for row in orders
+            )
+
+        response = StreamingHttpResponse(
+            content,
+            content_type=self.EXPORT_CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="menu-{menu.date}-orders.{export_format}"'
+        )
+
+        return response
 
     @action(detail=True, methods=['POST'])
     def publish(self, request, uuid=None):
@@ -43,6 +238,9 @@ class MenuViewSet(ModelViewSet):
         if len(menu.meal_options):
             menu.is_published = True
             menu.save()
+            menu.touch()
+            invalidate_public_menu(menu.uuid)
+            cache_public_menu(menu)
             send_menu_notification_by_slack.delay(menu.pk)
 
             return Response(
@@ -59,3 +257,34 @@ class MenuViewSet(ModelViewSet):
                 },
                 status=status.HTTP_304_NOT_MODIFIED,
             )
+
+    @action(detail=True, url_path='notification-progress')
+    def notification_progress(self, request, uuid=None):
+        menu = self.get_object()
+
+        return Response(
+            menu.notification_deliveries.get_progress(),
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=['POST'], url_path='resend-notification')
+    def resend_notification(self, request, uuid=None):
+        """
+        Sends the menu notification again to the employees it could not be
+        delivered to, the ones being sent are left to the task sending them
+        """
+        menu = self.get_object()
+        undelivered_count = menu.notification_deliveries.claimable().count()
+
+        if undelivered_count:
+            resend_menu_notification.delay(menu.pk)
+
+        return Response(
+            {
+                "detail": (
+                    f"Resending {undelivered_count} undelivered notifications "
+                    f"of {menu}"
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -1,6 +1,6 @@
 from datetime import time
 
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import (
@@ -9,69 +9,77 @@ from rest_framework import (
 )
 
 from backend_test.utils import datetime_utils
-from meal_api.models import (
-    Employee,
-    Menu,
-    Order,
+from meal_api.models import Order
+from meal_api.pagination import OrderCursorPagination
+from meal_api.serializers import (
+    OrderPlacementSerializer,
+    OrderSerializer,
 )
-from meal_api.serializers import OrderSerializer
 
 
 class OrderViewSet(ModelViewSet):
     serializer_class = OrderSerializer
     queryset = Order.objects.all()
     permission_classes = [permissions.IsAuthenticated | permissions.IsAdminUser]
+    pagination_class = OrderCursorPagination
 
     MAX_ALLOWED_ORDER_HOUR = time(hour=11)  # 11 AM
 
     def get_queryset(self):
         if self.request.user.is_superuser:
-            return Order.objects.all()
+            orders = Order.objects.all()
         else:
-            return Order.objects.filter(employee__id=self.request.user.id)
+            orders = Order.objects.filter(employee__id=self.request.user.id)
 
-    def create(self, request, pk=None):
-        employee = Employee.objects.get(pk=request.user.id)
-        selected_menu_option = request.data.get('selected_option')
-        order_customizations = request.data.get('customizations')
-        menu = get_object_or_404(Menu, uuid=request.data.get('menu'))
+        # the serialized orders point to their menu by uuid
+        return orders.select_related('menu')
 
-        order_already_exists = Order.objects.filter(
-            employee=employee,
-            menu=menu,
-        ).exists()
+    def create(self, request, pk=None):
+        order_placement_serializer = OrderPlacementSerializer(
+            data=request.data,
+        )
+        order_placement_serializer.is_valid(raise_exception=True)
 
-        if order_already_exists:
+        if datetime_utils.get_time_now() > self.MAX_ALLOWED_ORDER_HOUR:
             return Response(
                 {
                     "detail": (
-                        f"{menu} already has an order registered for employee "
-                        f"{employee}, you might want to edit the existing order."
+                        "Trying to make an order past to the allowed time,"
+                        "you should consider ordering before "
+                        f"{self.MAX_ALLOWED_ORDER_HOUR}"
                     ),
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        elif datetime_utils.get_time_now() > self.MAX_ALLOWED_ORDER_HOUR:
+
+        # the menu lookup, the duplicated order check and the insert are
+        # all resolved by a single statement
+        order, menu = Order.objects.place(
+            employee=request.user,
+            menu_uuid=order_placement_serializer.validated_data['menu'],
+            selected_option=(
+                order_placement_serializer.validated_data['selected_option']
+            ),
+            customizations=(
+                order_placement_serializer.validated_data['customizations']
+            ),
+        )
+
+        if menu is None:
+            raise Http404
+        elif order is None:
             return Response(
                 {
                     "detail": (
-                        "Trying to make an order past to the allowed time,"
-                        "you should consider ordering before "
-                        f"{self.MAX_ALLOWED_ORDER_HOUR}"
+                        f"{menu} already has an order registered for employee "
+                        f"{request.user}, you might want to edit the existing "
+                        "order."
                     ),
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        else:
-            order = Order.objects.create(
-                employee=employee,
-                menu=menu,
-                selected_option=selected_menu_option,
-                customizations=order_customizations,
-            )
-            order.save()
 
-            return Response(
-                self.serializer_class(order).data,
-                status=status.HTTP_201_CREATED,
-            )
+        return Response(
+            self.serializer_class(order).data,
+            status=status.HTTP_201_CREATED,
+        )
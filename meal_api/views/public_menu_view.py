@@ -7,6 +7,16 @@ from rest_framework import (
     generics,
 )
 
+from backend_test.utils.http_utils import (
+    get_etag,
+    get_not_modified_response,
+    set_conditional_headers,
+)
+from meal_api.cache import (
+    cache_public_menu,
+    get_cached_public_menu,
+    get_public_menu_generation,
+)
 from meal_api.serializers import MenuOptionSerializer
 from meal_api.models import (
     Menu,
@@ -20,18 +30,34 @@ class PublicMenuView(generics.RetrieveAPIView):
     queryset = MenuOption.objects.all()
 
     def retrieve(self, request=None, menu_uuid=None):
-        menu = get_object_or_404(
-            Menu,
-            uuid=menu_uuid,
-            is_published=True,
+        generation = get_public_menu_generation(menu_uuid)
+        cached_menu = get_cached_public_menu(menu_uuid, generation)
+
+        if cached_menu is None:
+            menu = get_object_or_404(
+                Menu,
+                uuid=menu_uuid,
+                is_published=True,
+            )
+            cached_menu = cache_public_menu(menu, generation)
+
+        etag = get_etag(
+            cached_menu['version'],
+            request.accepted_renderer.format,
+        )
+        not_modified_response = get_not_modified_response(
+            request,
+            etag,
+            cached_menu['updated_at'],
+            public=True,
         )
 
-        data = {
-            'Requested menu': str(menu),
-            'Menu meal options': [
-                self.serializer_class(meal_option).data
-                for meal_option in menu.meal_options
-            ],
-        }
+        if not_modified_response is not None:
+            return not_modified_response
 
-        return Response(data, status=status.HTTP_200_OK)
+        return set_conditional_headers(
+            Response(cached_menu['data'], status=status.HTTP_200_OK),
+            etag,
+            cached_menu['updated_at'],
+            public=True,
+        )